@@ -2,23 +2,54 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from config.config import config
+from app.cache import UserCache
+from app.security import password_hasher
+from app.sessions import init_sessions
 import os
 
 # Initialize extensions
 db = SQLAlchemy()
 migrate = Migrate()
+cache = UserCache()
 
-def create_app(config_name=None):
+def configure_sqlite(app):
+    """Apply SQLITE_PRAGMAS to each new connection of a SQLite engine."""
+    from sqlalchemy import event
+    
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    
+    with app.app_context():
+        engine = db.engine
+    
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+    
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+def create_app(config_name=None, config_overrides=None):
     """Application factory pattern."""
     if config_name is None:
         config_name = os.environ.get('FLASK_CONFIG', 'development')
     
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+    app.config.update(config_overrides or {})
     
     # Initialize extensions with app
     db.init_app(app)
     migrate.init_app(app, db)
+    cache.init_app(app)
+    password_hasher.init_app(app)
+    init_sessions(app)
+    configure_sqlite(app)
+    
+    from app.instrumentation import init_instrumentation
+    init_instrumentation(app)
     
     # Register blueprints
     from app.routes.main import main_bp
@@ -31,33 +62,4 @@ def create_app(config_name=None):
     app.register_blueprint(expenses_bp, url_prefix='/expenses')
     app.register_blueprint(api_bp, url_prefix='/api')
     
-    # Create database tables
-    with app.app_context():
-        db.create_all()
-        
-        # Initialize default categories if they don't exist
-        from app.models.category import Category
-        if not Category.query.filter_by(user_id=None).first():
-            default_categories = [
-                {'name': 'Food & Dining', 'icon': 'fas fa-utensils', 'color': '#EF4444'},
-                {'name': 'Transportation', 'icon': 'fas fa-car', 'color': '#10B981'},
-                {'name': 'Shopping', 'icon': 'fas fa-shopping-bag', 'color': '#8B5CF6'},
-                {'name': 'Entertainment', 'icon': 'fas fa-film', 'color': '#F59E0B'},
-                {'name': 'Bills & Utilities', 'icon': 'fas fa-lightbulb', 'color': '#06B6D4'},
-                {'name': 'Healthcare', 'icon': 'fas fa-hospital', 'color': '#EC4899'},
-                {'name': 'Education', 'icon': 'fas fa-book', 'color': '#6366F1'},
-                {'name': 'Other', 'icon': 'fas fa-folder', 'color': '#6B7280'},
-            ]
-            
-            for cat_data in default_categories:
-                category = Category(
-                    name=cat_data['name'],
-                    icon=cat_data['icon'],
-                    color=cat_data['color'],
-                    user_id=None  # Global categories
-                )
-                db.session.add(category)
-            
-            db.session.commit()
-    
-    return app
\ No newline at end of file
+    return app
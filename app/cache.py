@@ -0,0 +1,155 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+class MemoryBackend:
+    """In-process LRU cache with per-entry TTL."""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class RedisBackend:
+    """Cache backend for Redis or any server speaking its protocol."""
+
+    def __init__(self, url=None, client=None, prefix='cache:'):
+        self.prefix = prefix
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("CACHE_BACKEND='redis' requires the 'redis' package")
+            client = redis.Redis.from_url(url)
+        self.client = client
+
+    def get(self, key):
+        value = self.client.get(key)
+        return pickle.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl=None):
+        self.client.set(key, pickle.dumps(value), ex=ttl or None)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=f'{self.prefix}*'):
+            self.client.delete(key)
+
+class NullBackend:
+    """Backend that stores nothing, for disabling the cache."""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def clear(self):
+        pass
+
+class UserCache:
+    """Per-user cache of derived data, keyed on the user's data_version.
+
+    Every entry key embeds users.data_version, which each expense write
+    bumps in its own transaction, so a write in any process (another web
+    worker, a job worker) makes all of the user's entries stale at once;
+    they then age out through the TTL or LRU eviction.
+    """
+
+    def __init__(self, app=None):
+        self.backend = NullBackend()
+        self.default_ttl = 300
+        self.prefix = 'cache:'
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend = app.config.get('CACHE_BACKEND', 'memory')
+        self.default_ttl = app.config.get('CACHE_DEFAULT_TTL', 300)
+        self.prefix = app.config.get('CACHE_KEY_PREFIX', 'cache:')
+
+        if backend == 'memory':
+            self.backend = MemoryBackend(app.config.get('CACHE_MAX_ENTRIES', 10000))
+        elif backend == 'redis':
+            self.backend = RedisBackend(app.config.get('CACHE_REDIS_URL'), prefix=self.prefix)
+        elif backend == 'null':
+            self.backend = NullBackend()
+        else:
+            raise ValueError(f'Unknown CACHE_BACKEND: {backend}')
+
+        app.extensions['user_cache'] = self
+
+    def version(self, user_id):
+        """The user's data_version from the database, read once per app context."""
+        from flask import g
+        from app.models import User
+
+        versions = g.setdefault('data_versions', {})
+        if user_id not in versions:
+            versions[user_id] = User.get_data_version(user_id)
+        return versions[user_id]
+
+    def remember_version(self, user_id, version):
+        """Record a data_version the caller has just read, saving the lookup."""
+        from flask import g
+        g.setdefault('data_versions', {})[user_id] = version
+
+    def get_or_set(self, user_id, name, factory, ttl=None):
+        """Return the cached value for name, computing and storing it on a miss.
+
+        None results are returned but not cached; nothing is cached for a
+        user that does not exist.
+        """
+        version = self.version(user_id)
+        if version is None:
+            return factory()
+
+        key = f'{self.prefix}{user_id}:{version}:{name}'
+        value = self.backend.get(key)
+
+        if value is None:
+            value = factory()
+            if value is not None:
+                self.backend.set(key, value, ttl or self.default_ttl)
+
+        return value
+
+    def invalidate(self, user_id):
+        """Forget the version read in this app context. Call after the write commits.
+
+        The committed data_version bump is what makes old entries stale;
+        this only stops the rest of the current request using the old one.
+        """
+        from flask import g, has_app_context
+
+        if has_app_context():
+            g.get('data_versions', {}).pop(user_id, None)
+
+    def clear(self):
+        self.backend.clear()
@@ -0,0 +1,19 @@
+import asyncio
+
+async def gather_queries(app, *calls, concurrent=True):
+    """Run independent blocking query functions and return their results in order.
+
+    With concurrent=True each call runs on a worker thread inside its own app
+    context, and so with its own session and pooled connection, so the
+    database round trips overlap. Calls must not use request or session
+    state; pass what they need in explicitly. Queries made on the worker
+    threads are not included in the request's SQL metrics.
+    """
+    if not concurrent:
+        return [call() for call in calls]
+
+    def in_app_context(call):
+        with app.app_context():
+            return call()
+
+    return await asyncio.gather(*(asyncio.to_thread(in_app_context, call) for call in calls))
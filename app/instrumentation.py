@@ -0,0 +1,172 @@
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+logger = logging.getLogger('app.performance')
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class MetricsRegistry:
+    """Thread-safe in-process store of counters and histograms.
+
+    Values are per process; each worker exposes its own series.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help = {}
+        self._counters = {}
+        self._histograms = {}
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def inc(self, name, labels=None, amount=1):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, labels=None, buckets=LATENCY_BUCKETS):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self):
+        """Render all series in the Prometheus text exposition format."""
+        lines = []
+        seen = set()
+
+        def header(name, metric_type):
+            if name not in seen:
+                seen.add(name)
+                if name in self._help:
+                    lines.append(f'# HELP {name} {self._help[name]}')
+                lines.append(f'# TYPE {name} {metric_type}')
+
+        def label_text(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ''
+            return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                header(name, 'counter')
+                lines.append(f'{name}{label_text(labels)} {value}')
+
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                header(name, 'histogram')
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{label_text(labels, [("le", bound)])} {cumulative}')
+                lines.append(f'{name}_bucket{label_text(labels, [("le", "+Inf")])} {histogram.count}')
+                lines.append(f'{name}_sum{label_text(labels)} {histogram.sum}')
+                lines.append(f'{name}_count{label_text(labels)} {histogram.count}')
+
+        return '\n'.join(lines) + '\n'
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+metrics = MetricsRegistry()
+metrics.describe('http_requests_total', 'Requests handled, by blueprint, endpoint and status code.')
+metrics.describe('http_request_duration_seconds', 'Wall time per request.')
+metrics.describe('http_request_db_queries', 'SQL statements executed per request.')
+metrics.describe('http_request_db_seconds', 'Time spent in SQL per request.')
+metrics.describe('http_response_size_bytes', 'Response body size for non-streamed responses.')
+metrics.describe('db_slow_queries_total', 'Statements slower than SLOW_QUERY_THRESHOLD.')
+
+def init_instrumentation(app):
+    """Record wall time, SQL count/time and response size for every request."""
+    from flask import g, request
+    from flask_sqlalchemy.record_queries import get_recorded_queries
+
+    if not app.config.get('REQUEST_METRICS_ENABLED', True):
+        return
+
+    slow_threshold = app.config.get('SLOW_QUERY_THRESHOLD', 0.5)
+
+    logger.setLevel(app.config.get('PERFORMANCE_LOG_LEVEL', 'INFO'))
+    if not logger.handlers and not logging.getLogger().handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+
+    @app.before_request
+    def start_request_timer():
+        g._request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.pop('_request_started', None)
+        if started is None:
+            return response
+
+        elapsed = time.perf_counter() - started
+        queries = get_recorded_queries()
+        db_time = sum(query.duration for query in queries)
+        slowest = max(queries, key=lambda query: query.duration, default=None)
+        size = response.calculate_content_length()
+        labels = {'blueprint': request.blueprint or 'app', 'endpoint': request.endpoint or 'unknown'}
+
+        metrics.inc('http_requests_total', {**labels, 'status': response.status_code})
+        metrics.observe('http_request_duration_seconds', elapsed, labels)
+        metrics.observe('http_request_db_queries', len(queries), labels, QUERY_COUNT_BUCKETS)
+        metrics.observe('http_request_db_seconds', db_time, labels)
+        if size is not None:
+            metrics.observe('http_response_size_bytes', size, labels, SIZE_BUCKETS)
+
+        for query in queries:
+            if query.duration >= slow_threshold:
+                metrics.inc('db_slow_queries_total', labels)
+                logger.warning(json.dumps({
+                    'event': 'slow_query',
+                    'endpoint': request.endpoint,
+                    'duration_ms': round(query.duration * 1000, 2),
+                    'statement': query.statement,
+                    'location': query.location
+                }))
+
+        logger.info(json.dumps({
+            'event': 'request',
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'blueprint': labels['blueprint'],
+            'status': response.status_code,
+            'duration_ms': round(elapsed * 1000, 2),
+            'db_queries': len(queries),
+            'db_time_ms': round(db_time * 1000, 2),
+            'slowest_query_ms': round(slowest.duration * 1000, 2) if slowest else None,
+            'slowest_query': slowest.statement if slowest else None,
+            'response_bytes': size
+        }))
+
+        return response
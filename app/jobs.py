@@ -0,0 +1,337 @@
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from app import db
+
+logger = logging.getLogger('app.jobs')
+
+# kind -> handler(payload) returning a JSON-serialisable result
+JOB_HANDLERS = {}
+
+# How often a running worker looks for jobs abandoned by a crashed one and
+# prunes finished jobs past JOB_RETENTION_DAYS
+STALE_SWEEP_SECONDS = 60
+
+class JobFailed(Exception):
+    """Raised by a handler for errors that retrying cannot fix."""
+
+def job_handler(kind):
+    """Register the decorated function as the handler for a job kind."""
+    def register(f):
+        JOB_HANDLERS[kind] = f
+        return f
+    return register
+
+def save_upload(upload):
+    """Spool an uploaded file to JOB_UPLOAD_DIR for a job and return its path.
+
+    Workers on other hosts need the directory on shared storage.
+    """
+    import uuid
+    from flask import current_app
+
+    directory = current_app.config.get('JOB_UPLOAD_DIR') or os.path.join(current_app.instance_path, 'job-uploads')
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, uuid.uuid4().hex)
+    upload.save(path)
+    return path
+
+def discard_upload(path):
+    """Delete a spooled upload if it is still there."""
+    if path:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def prune_jobs(before):
+    """Delete finished jobs older than before, with any upload they left behind.
+
+    Returns the number of jobs removed; the caller commits.
+    """
+    from app.models.job import Job
+
+    finished = Job.query.filter(
+        Job.status.in_((Job.SUCCEEDED, Job.FAILED)), Job.finished_at < before
+    )
+    for (payload,) in finished.with_entities(Job.payload):
+        discard_upload((payload or {}).get('path'))
+
+    return finished.delete(synchronize_session=False)
+
+def retry_delay(attempts, base, cap):
+    """Seconds to wait before retry number ``attempts``: capped exponential backoff with jitter."""
+    delay = min(cap, base * 2 ** max(attempts - 1, 0))
+    return delay * random.uniform(0.5, 1.0)
+
+def enqueue(kind, payload=None, user_id=None, max_attempts=None):
+    """Queue a job and commit it.
+
+    With JOBS_EAGER (the testing config) the job also runs right here,
+    retries included and without backoff, so no worker is needed.
+    """
+    from flask import current_app
+    from app.models.job import Job
+
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f'Unknown job kind: {kind}')
+
+    job = Job(kind, payload, user_id, max_attempts or current_app.config.get('JOB_MAX_ATTEMPTS', 3))
+    db.session.add(job)
+    db.session.commit()
+
+    if current_app.config.get('JOBS_EAGER'):
+        while job.status == Job.QUEUED:
+            job.status = Job.RUNNING
+            job.attempts += 1
+            job.locked_by = 'eager'
+            job.locked_at = datetime.utcnow()
+            db.session.commit()
+            run_job(job)
+
+    return job
+
+def claim_job(worker_id):
+    """Claim the oldest due job for this worker, or return None.
+
+    The claim is a conditional UPDATE (status still 'queued'), so two
+    workers racing for the same row cannot both win; PostgreSQL also skips
+    rows another worker has locked.
+    """
+    from app.models.job import Job
+
+    for _ in range(5):
+        now = datetime.utcnow()
+        job_id = db.session.query(Job.id).filter(
+            Job.status == Job.QUEUED, Job.run_at <= now
+        ).order_by(Job.run_at, Job.id).limit(1).with_for_update(skip_locked=True).scalar()
+
+        if job_id is None:
+            db.session.rollback()
+            return None
+
+        claimed = Job.query.filter(Job.id == job_id, Job.status == Job.QUEUED).update({
+            Job.status: Job.RUNNING,
+            Job.attempts: Job.attempts + 1,
+            Job.locked_by: worker_id,
+            Job.locked_at: now
+        }, synchronize_session=False)
+        db.session.commit()
+
+        if claimed:
+            return db.session.get(Job, job_id)
+
+    return None
+
+def run_job(job):
+    """Run a claimed job's handler and record the outcome.
+
+    A failed attempt goes back to the queue with exponential backoff until
+    max_attempts is reached; JobFailed and unknown kinds fail straight away.
+    Only JobFailed messages are stored on the job; anything else is logged
+    and recorded as a generic error.
+    """
+    from flask import current_app
+    from app.models.job import Job
+
+    handler = JOB_HANDLERS.get(job.kind)
+    job_id = job.id
+    started = datetime.utcnow()
+
+    try:
+        if handler is None:
+            raise JobFailed(f'Unknown job kind: {job.kind}')
+        result = handler(dict(job.payload or {}))
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(Job, job_id)
+        if isinstance(e, JobFailed):
+            job.error = str(e) or 'Job failed'
+        else:
+            # Users can read job errors, so keep SQL and paths in the log only
+            logger.exception('job %s (%s) raised', job_id, job.kind)
+            job.error = 'Internal error'
+
+        if isinstance(e, JobFailed) or job.attempts >= job.max_attempts:
+            job.status = Job.FAILED
+            job.finished_at = datetime.utcnow()
+        else:
+            delay = retry_delay(
+                job.attempts,
+                current_app.config.get('JOB_RETRY_BASE_SECONDS', 10),
+                current_app.config.get('JOB_RETRY_MAX_SECONDS', 600)
+            )
+            job.status = Job.QUEUED
+            job.run_at = datetime.utcnow() + timedelta(seconds=delay)
+
+        db.session.commit()
+        logger.warning('job %s (%s) attempt %s/%s failed: %s',
+                       job.id, job.kind, job.attempts, job.max_attempts, job.error)
+        return job
+
+    job = db.session.get(Job, job_id)
+    job.status = Job.SUCCEEDED
+    job.result = result
+    job.error = None
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    logger.info('job %s (%s) succeeded in %.2fs', job.id, job.kind,
+                (job.finished_at - started).total_seconds())
+    return job
+
+def requeue_stale_jobs(timeout):
+    """Return jobs left 'running' longer than timeout seconds (a crashed worker) to the queue.
+
+    Jobs that are out of attempts fail instead. Returns the number of jobs
+    touched; the caller commits.
+    """
+    from app.models.job import Job
+
+    cutoff = datetime.utcnow() - timedelta(seconds=timeout)
+    stale = (Job.status == Job.RUNNING) & (Job.locked_at < cutoff)
+
+    failed = Job.query.filter(stale, Job.attempts >= Job.max_attempts).update({
+        Job.status: Job.FAILED,
+        Job.error: 'Timed out',
+        Job.finished_at: datetime.utcnow()
+    }, synchronize_session=False)
+    requeued = Job.query.filter(stale).update({
+        Job.status: Job.QUEUED,
+        Job.run_at: datetime.utcnow()
+    }, synchronize_session=False)
+
+    return failed + requeued
+
+class Worker:
+    """Pool of threads that claim and run queued jobs.
+
+    Each thread works in its own app context, and so its own session and
+    connection. With burst=True threads exit once no job is due instead of
+    polling.
+    """
+
+    def __init__(self, app, threads=2, poll_interval=1.0, burst=False):
+        self.app = app
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.burst = burst
+        self.name = f'{socket.gethostname()}:{os.getpid()}'
+        self.processed = 0
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._last_sweep = 0.0
+
+    def stop(self):
+        """Ask the threads to exit after their current job."""
+        self._stopping.set()
+
+    def run(self):
+        """Run until stop() is called (or, in burst mode, the queue is drained)."""
+        with self.app.app_context():
+            self._sweep()
+
+        workers = [
+            threading.Thread(target=self._work, args=(f'{self.name}:{index}',), daemon=True)
+            for index in range(self.threads)
+        ]
+        for thread in workers:
+            thread.start()
+
+        try:
+            self._join(workers)
+        except KeyboardInterrupt:
+            logger.warning('stopping after the current jobs')
+            self.stop()
+            self._join(workers)
+
+        return self.processed
+
+    def _join(self, workers):
+        for thread in workers:
+            # Join with a timeout so the main thread still receives signals
+            while thread.is_alive():
+                thread.join(0.5)
+
+    def _sweep(self):
+        with self._lock:
+            if time.monotonic() - self._last_sweep < STALE_SWEEP_SECONDS and self._last_sweep:
+                return
+            self._last_sweep = time.monotonic()
+
+        requeued = requeue_stale_jobs(self.app.config.get('JOB_TIMEOUT_SECONDS', 900))
+        pruned = prune_jobs(datetime.utcnow() - timedelta(days=self.app.config.get('JOB_RETENTION_DAYS', 30)))
+        db.session.commit()
+        if requeued:
+            logger.warning('requeued %s stale jobs', requeued)
+        if pruned:
+            logger.info('pruned %s finished jobs', pruned)
+
+    def _work(self, worker_id):
+        while not self._stopping.is_set():
+            with self.app.app_context():
+                try:
+                    job = claim_job(worker_id)
+                    if job is not None:
+                        run_job(job)
+                    else:
+                        self._sweep()
+                except Exception:
+                    logger.exception('worker %s failed to process a job', worker_id)
+                    job = None
+                finally:
+                    db.session.remove()
+
+            if job is not None:
+                with self._lock:
+                    self.processed += 1
+            elif self.burst:
+                return
+            else:
+                self._stopping.wait(self.poll_interval)
+
+@job_handler('import_expenses')
+def import_expenses_job(payload):
+    """Import a bank export spooled by save_upload, then delete the file."""
+    from app.services import import_expenses, ImportFileError
+
+    try:
+        with open(payload['path'], encoding='utf-8-sig', errors='replace', newline='') as stream:
+            result = import_expenses(
+                payload['user_id'],
+                stream,
+                file_format=payload.get('format', 'csv'),
+                batch_size=payload.get('batch_size', 1000),
+                default_category=payload.get('default_category'),
+                expense_sign=payload.get('expense_sign', 'negative')
+            )
+    except FileNotFoundError:
+        raise JobFailed('Uploaded file is no longer available')
+    except ImportFileError as e:
+        raise JobFailed(str(e))
+    finally:
+        # Imports run once, so the file is not needed again either way
+        discard_upload(payload['path'])
+
+    return result.to_dict()
+
+@job_handler('rebuild_rollups')
+def rebuild_rollups_job(payload):
+    """Rebuild the monthly rollups, for one user or everyone."""
+    from app.models import ExpenseRollup
+
+    buckets = ExpenseRollup.rebuild(payload.get('user_id'))
+    db.session.commit()
+    return {'buckets': buckets}
+
+@job_handler('reconcile_category_counters')
+def reconcile_category_counters_job(payload):
+    """Repair category counters that drifted from the expenses table."""
+    from app.models import Category
+
+    mismatches = Category.reconcile_counters()
+    db.session.commit()
+    return {'fixed': len(mismatches)}
@@ -2,5 +2,8 @@
 from .user import User
 from .category import Category
 from .expense import Expense
+from .rollup import ExpenseRollup
+from .tombstone import Tombstone
+from .job import Job
 
-__all__ = ['User', 'Category', 'Expense']
\ No newline at end of file
+__all__ = ['User', 'Category', 'Expense', 'ExpenseRollup', 'Tombstone', 'Job']
\ No newline at end of file
@@ -1,5 +1,17 @@
 from app import db
 from datetime import datetime
+from sqlalchemy import Index
+
+DEFAULT_CATEGORIES = [
+    {'name': 'Food & Dining', 'icon': 'fas fa-utensils', 'color': '#EF4444'},
+    {'name': 'Transportation', 'icon': 'fas fa-car', 'color': '#10B981'},
+    {'name': 'Shopping', 'icon': 'fas fa-shopping-bag', 'color': '#8B5CF6'},
+    {'name': 'Entertainment', 'icon': 'fas fa-film', 'color': '#F59E0B'},
+    {'name': 'Bills & Utilities', 'icon': 'fas fa-lightbulb', 'color': '#06B6D4'},
+    {'name': 'Healthcare', 'icon': 'fas fa-hospital', 'color': '#EC4899'},
+    {'name': 'Education', 'icon': 'fas fa-book', 'color': '#6366F1'},
+    {'name': 'Other', 'icon': 'fas fa-folder', 'color': '#6B7280'},
+]
 
 class Category(db.Model):
     """Category model for organizing expenses."""
@@ -14,9 +26,19 @@ class Category(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Maintained by record_expenses at every expense write; see reconcile_counters.
+    # Only a user's own categories keep counters: the shared global rows would
+    # mix every user's spending and serialize all writers on a few rows.
+    expense_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    total_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0, server_default='0')
+    
     # Relationships
     expenses = db.relationship('Expense', backref='category', lazy='dynamic')
     
+    __table_args__ = (
+        Index('ix_categories_user_updated', 'user_id', 'updated_at'),
+    )
+    
     def __init__(self, name, icon='fas fa-folder', color='#6B7280', user_id=None):
         self.name = name
         self.icon = icon
@@ -32,23 +54,92 @@ class Category(db.Model):
     
     def get_total_amount(self, user_id=None, year=None, month=None):
         """Get total amount for this category."""
-        from sqlalchemy import func, extract
+        from sqlalchemy import func
         from app.models.expense import Expense
+        from app.utils import period_filter
         
-        query = db.session.query(func.sum(Expense.amount)).filter_by(category_id=self.id)
+        query = db.session.query(func.sum(Expense.amount)).filter(Expense.category_id == self.id)
         
         if user_id:
             query = query.filter(Expense.user_id == user_id)
         
-        if year:
-            query = query.filter(extract('year', Expense.date) == year)
-        
-        if month:
-            query = query.filter(extract('month', Expense.date) == month)
+        query = query.filter(*period_filter(Expense.date, year, month))
             
         result = query.scalar()
         return result or 0.0
     
+    @staticmethod
+    def record_expenses(rows, sign=1):
+        """Adjust the counters for added (sign=1) or deleted (sign=-1) expense rows.
+        
+        Rows are (user_id, category_id, date, amount) like ExpenseRollup.record.
+        Global categories are left alone. Runs in the caller's transaction;
+        the caller commits.
+        """
+        deltas = {}
+        for _, category_id, _, amount in rows:
+            total, count = deltas.get(int(category_id), (0.0, 0))
+            deltas[int(category_id)] = (total + sign * float(amount), count + sign)
+        
+        # Fixed order so concurrent writers lock category rows consistently.
+        # updated_at is kept: counter changes are not edits to the category
+        # and must not show up in /api/sync.
+        for category_id, (total, count) in sorted(deltas.items()):
+            Category.query.filter(Category.id == category_id, Category.user_id != None).update({
+                Category.expense_count: Category.expense_count + count,
+                Category.total_amount: Category.total_amount + total,
+                Category.updated_at: Category.updated_at
+            }, synchronize_session=False)
+    
+    @staticmethod
+    def reconcile_counters(dry_run=False):
+        """Compare the counters with the expenses table and fix any that drifted.
+        
+        Returns the mismatched categories; with dry_run nothing is changed.
+        Global categories keep no counters, so theirs should be zero. Owners
+        of fixed categories get their data_version bumped. The caller commits.
+        """
+        from sqlalchemy import func
+        from app.models.expense import Expense
+        from app.models.user import User
+        
+        raw = db.session.query(
+            Expense.category_id,
+            func.count(Expense.id).label('count'),
+            func.sum(Expense.amount).label('total')
+        ).group_by(Expense.category_id).subquery()
+        
+        rows = db.session.query(
+            Category.id,
+            Category.user_id,
+            Category.expense_count,
+            Category.total_amount,
+            func.coalesce(raw.c.count, 0).label('count'),
+            func.coalesce(raw.c.total, 0).label('total')
+        ).outerjoin(raw, raw.c.category_id == Category.id).order_by(Category.id).all()
+        
+        mismatches = []
+        for row in rows:
+            if row.user_id is None:
+                expected = (0, 0.0)
+            else:
+                expected = (int(row.count), round(float(row.total), 2))
+            actual = (row.expense_count, round(float(row.total_amount), 2))
+            if expected != actual:
+                mismatches.append({'id': row.id, 'user_id': row.user_id, 'expected': expected, 'actual': actual})
+        
+        if mismatches and not dry_run:
+            table = Category.__table__
+            db.session.execute(table.update().where(
+                table.c.id == db.bindparam('category_id')
+            ).values(updated_at=table.c.updated_at), [
+                {'category_id': m['id'], 'expense_count': m['expected'][0], 'total_amount': m['expected'][1]}
+                for m in mismatches
+            ])
+            User.bump_data_versions(m['user_id'] for m in mismatches)
+        
+        return mismatches
+    
     @staticmethod
     def get_user_categories(user_id):
         """Get all categories available to a user (personal + global)."""
@@ -56,33 +147,86 @@ class Category(db.Model):
             (Category.user_id == user_id) | (Category.user_id == None)
         ).order_by(Category.name).all()
     
+    @staticmethod
+    def seed_defaults():
+        """Add any missing global default categories. Safe to run repeatedly."""
+        existing = {
+            name for (name,) in db.session.query(Category.name).filter(Category.user_id == None)
+        }
+        
+        added = 0
+        for cat_data in DEFAULT_CATEGORIES:
+            if cat_data['name'] not in existing:
+                db.session.add(Category(user_id=None, **cat_data))
+                added += 1
+        
+        return added
+    
     @staticmethod
     def create_user_categories(user_id):
-        """Create personal copies of default categories for a new user."""
-        default_categories = Category.query.filter_by(user_id=None).all()
-        
-        for default_cat in default_categories:
-            user_category = Category(
-                name=default_cat.name,
-                icon=default_cat.icon,
-                color=default_cat.color,
-                user_id=user_id
-            )
-            db.session.add(user_category)
+        """Create personal copies of default categories for a new user.
+        
+        Runs in the caller's transaction; the caller commits.
+        """
+        Category.provision_user_categories([user_id])
+    
+    @staticmethod
+    def provision_user_categories(user_ids):
+        """Copy the global categories to each of the given users in one INSERT ... SELECT."""
+        from sqlalchemy import insert, select, literal, true
+        from app.models.user import User
+        
+        if not user_ids:
+            return
+        
+        now = datetime.utcnow()
+        defaults = Category.__table__.alias('defaults')
+        users = User.__table__
         
-        db.session.commit()
+        db.session.execute(
+            insert(Category.__table__).from_select(
+                ['name', 'icon', 'color', 'user_id', 'created_at', 'updated_at'],
+                select(
+                    defaults.c.name,
+                    defaults.c.icon,
+                    defaults.c.color,
+                    users.c.id,
+                    literal(now, Category.created_at.type),
+                    literal(now, Category.updated_at.type)
+                ).select_from(
+                    defaults.join(users, true())  # explicit cross join
+                ).where(
+                    defaults.c.user_id == None,
+                    users.c.id.in_(list(user_ids))
+                ).order_by(users.c.id, defaults.c.id)
+            )
+        )
     
     def __repr__(self):
         return f'<Category {self.name}>'
     
     def to_dict(self):
-        """Convert category to dictionary."""
-        return {
+        """Convert category to dictionary; counters are only included for a user's own categories."""
+        data = {
             'id': self.id,
             'name': self.name,
             'icon': self.icon,
             'color': self.color,
             'user_id': self.user_id,
-            'expense_count': self.get_expense_count(),
             'created_at': self.created_at.isoformat()
+        }
+        
+        if self.user_id is not None:
+            data['expense_count'] = self.expense_count
+            data['total_amount'] = float(self.total_amount or 0)
+        
+        return data
+    
+    def to_summary_dict(self):
+        """Convert category to a dictionary without touching its expenses."""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'icon': self.icon,
+            'color': self.color
         }
\ No newline at end of file
@@ -1,6 +1,7 @@
 from app import db
 from datetime import datetime
 from sqlalchemy import Index
+from sqlalchemy.orm import joinedload
 
 class Expense(db.Model):
     """Expense model for tracking user expenses."""
@@ -19,7 +20,11 @@ class Expense(db.Model):
     # Composite indexes for better query performance
     __table_args__ = (
         Index('ix_expenses_user_date', 'user_id', 'date'),
-        Index('ix_expenses_user_category', 'user_id', 'category_id'),
+        # Covers per-category range sums (user, category, date range -> amount)
+        Index('ix_expenses_user_category_date', 'user_id', 'category_id', 'date', 'amount'),
+        Index('ix_expenses_user_keyset', 'user_id', 'date', 'created_at', 'id'),
+        # Sync reads a user's changes in (updated_at, id) order
+        Index('ix_expenses_user_updated', 'user_id', 'updated_at', 'id'),
     )
     
     def __init__(self, user_id, category_id, amount, description=None, date=None):
@@ -30,12 +35,12 @@ class Expense(db.Model):
         self.date = date if date else datetime.now().date()
     
     @staticmethod
-    def get_user_expenses(user_id, page=1, per_page=20, category_id=None, date_from=None, date_to=None):
-        """Get paginated expenses for a user with optional filters."""
-        query = Expense.query.filter_by(user_id=user_id)
+    def filter_user_expenses(query, user_id, category_id=None, date_from=None, date_to=None):
+        """Apply the expense list filters to a query over Expense."""
+        query = query.filter(Expense.user_id == user_id)
         
         if category_id:
-            query = query.filter_by(category_id=category_id)
+            query = query.filter(Expense.category_id == category_id)
         
         if date_from:
             query = query.filter(Expense.date >= date_from)
@@ -43,21 +48,168 @@ class Expense(db.Model):
         if date_to:
             query = query.filter(Expense.date <= date_to)
         
+        return query
+    
+    @staticmethod
+    def get_user_expenses(user_id, page=1, per_page=20, category_id=None, date_from=None, date_to=None):
+        """Get paginated expenses for a user with optional filters."""
+        query = Expense.filter_user_expenses(
+            Expense.query.options(joinedload(Expense.category)),
+            user_id, category_id, date_from, date_to
+        )
+        
         return query.order_by(Expense.date.desc(), Expense.created_at.desc()).paginate(
             page=page, per_page=per_page, error_out=False
         )
     
+    @staticmethod
+    def get_user_expenses_page(user_id, cursor=None, per_page=20, category_id=None, date_from=None, date_to=None, count=None):
+        """Get one keyset-paginated page of expenses, newest first.
+        
+        Pages are keyed on (date, created_at, id) so deep pages cost the same
+        as the first one. ``count`` may be None (no total), 'exact' (COUNT
+        query) or 'estimate' (read from the monthly rollups).
+        """
+        from sqlalchemy import tuple_, literal
+        from app.pagination import KeysetPage, InvalidCursor, encode_cursor, decode_cursor
+        
+        query = Expense.filter_user_expenses(
+            Expense.query.options(joinedload(Expense.category)),
+            user_id, category_id, date_from, date_to
+        )
+        # The total covers every filtered row, not just those past the cursor
+        filtered = query
+        sort_key = tuple_(Expense.date, Expense.created_at, Expense.id)
+        direction = 'next'
+        
+        if cursor:
+            direction, values = decode_cursor(cursor)
+            try:
+                key = tuple_(
+                    literal(datetime.strptime(values[0], '%Y-%m-%d').date(), Expense.date.type),
+                    literal(datetime.fromisoformat(values[1]), Expense.created_at.type),
+                    literal(int(values[2]), Expense.id.type)
+                )
+            except (ValueError, TypeError, IndexError):
+                raise InvalidCursor('Malformed pagination cursor')
+            
+            query = query.filter(sort_key < key if direction == 'next' else sort_key > key)
+        
+        if direction == 'next':
+            query = query.order_by(Expense.date.desc(), Expense.created_at.desc(), Expense.id.desc())
+        else:
+            query = query.order_by(Expense.date, Expense.created_at, Expense.id)
+        
+        items = query.limit(per_page + 1).all()
+        has_more = len(items) > per_page
+        items = items[:per_page]
+        
+        if direction == 'prev':
+            items.reverse()
+            has_next, has_prev = True, has_more
+        else:
+            has_next, has_prev = has_more, bool(cursor)
+        
+        def cursor_for(expense, cursor_direction):
+            return encode_cursor(cursor_direction, [
+                expense.date.isoformat(), expense.created_at.isoformat(), expense.id
+            ])
+        
+        total = None
+        if count == 'exact':
+            total = filtered.count()
+        elif count == 'estimate':
+            total = Expense.estimate_user_expense_count(user_id, category_id, date_from, date_to)
+        
+        return KeysetPage(
+            items,
+            next_cursor=cursor_for(items[-1], 'next') if items and has_next else None,
+            prev_cursor=cursor_for(items[0], 'prev') if items and has_prev else None,
+            total=total
+        )
+    
+    @staticmethod
+    def search_user_expenses(user_id, text, cursor=None, per_page=20, category_id=None, date_from=None, date_to=None, count=None):
+        """Get one page of expenses whose description matches every word of text, best first.
+        
+        Backed by the full-text index (see app.search). Relevance order has no
+        stable key to seek on, so cursors carry an offset. ``count`` may be
+        None or 'exact'.
+        """
+        from app.pagination import KeysetPage, InvalidCursor, encode_cursor, decode_cursor
+        from app.search import apply_search, search_terms
+        
+        offset = 0
+        if cursor:
+            _, values = decode_cursor(cursor)
+            try:
+                offset = int(values[0])
+            except (ValueError, TypeError, IndexError):
+                raise InvalidCursor('Malformed pagination cursor')
+            if offset < 0:
+                raise InvalidCursor('Malformed pagination cursor')
+        
+        if not search_terms(text):
+            return KeysetPage([], total=0 if count else None)
+        
+        query = Expense.filter_user_expenses(
+            Expense.query.options(joinedload(Expense.category)),
+            user_id, category_id, date_from, date_to
+        )
+        query, rank = apply_search(query, Expense, text, db.session.get_bind().dialect.name)
+        
+        order = [Expense.date.desc(), Expense.id.desc()]
+        if rank is not None:
+            order.insert(0, rank)
+        
+        items = query.order_by(*order).offset(offset).limit(per_page + 1).all()
+        has_next = len(items) > per_page
+        items = items[:per_page]
+        
+        return KeysetPage(
+            items,
+            next_cursor=encode_cursor('next', [offset + per_page]) if has_next else None,
+            prev_cursor=encode_cursor('prev', [max(offset - per_page, 0)]) if offset else None,
+            total=query.order_by(None).count() if count == 'exact' else None
+        )
+    
+    @staticmethod
+    def estimate_user_expense_count(user_id, category_id=None, date_from=None, date_to=None):
+        """Estimate a filtered expense count from the monthly rollups.
+        
+        Exact unless a date bound falls mid-month, in which case the whole
+        month is counted.
+        """
+        from sqlalchemy import func
+        from app.models.rollup import ExpenseRollup
+        
+        query = db.session.query(func.coalesce(func.sum(ExpenseRollup.count), 0)).filter(
+            ExpenseRollup.user_id == user_id
+        )
+        month_key = ExpenseRollup.year * 100 + ExpenseRollup.month
+        
+        if category_id:
+            query = query.filter(ExpenseRollup.category_id == category_id)
+        
+        if date_from:
+            query = query.filter(ExpenseRollup.year >= date_from.year, month_key >= date_from.year * 100 + date_from.month)
+        
+        if date_to:
+            query = query.filter(ExpenseRollup.year <= date_to.year, month_key <= date_to.year * 100 + date_to.month)
+        
+        return int(query.scalar())
+    
     @staticmethod
     def get_recent_expenses(user_id, limit=10):
         """Get recent expenses for a user."""
-        return Expense.query.filter_by(user_id=user_id).order_by(
+        return Expense.query.options(joinedload(Expense.category)).filter_by(user_id=user_id).order_by(
             Expense.date.desc(), Expense.created_at.desc()
         ).limit(limit).all()
     
     @staticmethod
     def get_monthly_expenses(user_id, year=None, month=None):
         """Get expenses for a specific month."""
-        from sqlalchemy import extract
+        from app.utils import period_filter
         
         if year is None:
             year = datetime.now().year
@@ -66,68 +218,122 @@ class Expense(db.Model):
             
         return Expense.query.filter(
             Expense.user_id == user_id,
-            extract('year', Expense.date) == year,
-            extract('month', Expense.date) == month
+            *period_filter(Expense.date, year, month)
         ).order_by(Expense.date.desc()).all()
     
     @staticmethod
-    def get_category_totals(user_id, year=None, month=None):
-        """Get spending totals grouped by category."""
-        from sqlalchemy import func, extract
+    def get_category_totals(user_id, year=None, month=None, date_from=None, date_to=None):
+        """Get spending totals grouped by category, including categories with nothing spent.
+        
+        Whole years and months are read from the rollups; an explicit
+        date_from/date_to range sums the expenses through the covering
+        (user_id, category_id, date, amount) index. As in period_range, a
+        month without a year is that month of the current year.
+        """
+        from sqlalchemy import func
         from app.models.category import Category
+        from app.models.rollup import ExpenseRollup
+        
+        if date_from or date_to:
+            return Expense._get_category_range_totals(user_id, date_from, date_to)
+        
+        if month and not year:
+            year = datetime.now().year
+        
+        join_condition = (Category.id == ExpenseRollup.category_id) & (ExpenseRollup.user_id == user_id)
+        
+        if year:
+            join_condition = join_condition & (ExpenseRollup.year == year)
+        
+        if month:
+            join_condition = join_condition & (ExpenseRollup.month == month)
+        
+        total = func.coalesce(func.sum(ExpenseRollup.total), 0)
         
         query = db.session.query(
             Category.id,
             Category.name,
             Category.icon,
             Category.color,
-            func.coalesce(func.sum(Expense.amount), 0).label('total')
+            total.label('total')
         ).outerjoin(
-            Expense, (Category.id == Expense.category_id) & (Expense.user_id == user_id)
+            ExpenseRollup, join_condition
         ).filter(
             (Category.user_id == user_id) | (Category.user_id == None)
         )
         
-        if year:
-            query = query.filter(
-                (Expense.date == None) | (extract('year', Expense.date) == year)
-            )
+        return query.group_by(Category.id, Category.name, Category.icon, Category.color).order_by(total.desc(), Category.name).all()
+    
+    @staticmethod
+    def _get_category_range_totals(user_id, date_from=None, date_to=None):
+        """Category totals over an inclusive date range, straight from the expenses."""
+        from sqlalchemy import func
+        from app.models.category import Category
         
-        if month:
-            query = query.filter(
-                (Expense.date == None) | (extract('month', Expense.date) == month)
-            )
+        # The range lives in the join condition so categories without
+        # expenses in it still come back, with a zero total
+        join_condition = (Expense.category_id == Category.id) & (Expense.user_id == user_id)
+        
+        if date_from:
+            join_condition = join_condition & (Expense.date >= date_from)
+        
+        if date_to:
+            join_condition = join_condition & (Expense.date <= date_to)
+        
+        total = func.coalesce(func.sum(Expense.amount), 0)
         
-        return query.group_by(Category.id, Category.name, Category.icon, Category.color).order_by(func.sum(Expense.amount).desc()).all()
+        query = db.session.query(
+            Category.id,
+            Category.name,
+            Category.icon,
+            Category.color,
+            total.label('total')
+        ).outerjoin(
+            Expense, join_condition
+        ).filter(
+            (Category.user_id == user_id) | (Category.user_id == None)
+        )
+        
+        return query.group_by(Category.id, Category.name, Category.icon, Category.color).order_by(total.desc(), Category.name).all()
     
     @staticmethod
     def get_monthly_chart_data(user_id, months=6):
         """Get monthly spending data for charts."""
-        from sqlalchemy import func, extract
+        from sqlalchemy import func
         from dateutil.relativedelta import relativedelta
+        from app.models.rollup import ExpenseRollup
         
         end_date = datetime.now().date()
         start_date = end_date - relativedelta(months=months-1)
         
         # Get monthly totals
         monthly_data = db.session.query(
-            extract('year', Expense.date).label('year'),
-            extract('month', Expense.date).label('month'),
-            func.sum(Expense.amount).label('total')
+            ExpenseRollup.year.label('year'),
+            ExpenseRollup.month.label('month'),
+            func.sum(ExpenseRollup.total).label('total')
         ).filter(
-            Expense.user_id == user_id,
-            Expense.date >= start_date,
-            Expense.date <= end_date
+            ExpenseRollup.user_id == user_id,
+            ExpenseRollup.year.between(start_date.year, end_date.year),
+            (ExpenseRollup.year * 100 + ExpenseRollup.month).between(
+                start_date.year * 100 + start_date.month,
+                end_date.year * 100 + end_date.month
+            )
         ).group_by(
-            extract('year', Expense.date),
-            extract('month', Expense.date)
+            ExpenseRollup.year,
+            ExpenseRollup.month
+        ).having(
+            func.sum(ExpenseRollup.count) > 0
         ).order_by(
-            extract('year', Expense.date),
-            extract('month', Expense.date)
+            ExpenseRollup.year,
+            ExpenseRollup.month
         ).all()
         
         return monthly_data
     
+    def rollup_row(self):
+        """Return the (user_id, category_id, date, amount) row used by ExpenseRollup."""
+        return (self.user_id, self.category_id, self.date, self.amount)
+    
     def __repr__(self):
         return f'<Expense {self.amount} - {self.description or "No description"}>'
     
@@ -141,5 +347,31 @@ class Expense(db.Model):
             'description': self.description,
             'date': self.date.isoformat(),
             'created_at': self.created_at.isoformat(),
-            'category': self.category.to_dict() if self.category else None
-        }
\ No newline at end of file
+            'category': self.category.to_summary_dict() if self.category else None
+        }
+    
+    def to_sync_dict(self):
+        """Convert expense to the flat dictionary returned by /api/sync."""
+        return {
+            'id': self.id,
+            'category_id': self.category_id,
+            'amount': float(self.amount),
+            'description': self.description,
+            'date': self.date.isoformat(),
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+    
+    def to_summary_dict(self):
+        """Convert expense to a list-view dictionary without per-row queries."""
+        return {
+            'id': self.id,
+            'amount': float(self.amount),
+            'description': self.description,
+            'date': self.date.isoformat(),
+            'category': self.category.to_summary_dict() if self.category else None
+        }
+
+# Full-text index on description, created alongside the table
+from app.search import register_search_ddl
+register_search_ddl(Expense.__table__)
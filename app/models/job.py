@@ -0,0 +1,74 @@
+from app import db
+from datetime import datetime
+from sqlalchemy import Index
+
+class Job(db.Model):
+    """Background job, queued in the database and run by 'flask worker'."""
+
+    __tablename__ = 'jobs'
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    status = db.Column(db.String(20), nullable=False, default=QUEUED)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = db.Column(db.String(100), nullable=True)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    result = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # Workers claim the oldest due job: status = 'queued' AND run_at <= now
+        Index('ix_jobs_status_run_at', 'status', 'run_at'),
+        Index('ix_jobs_user_created', 'user_id', 'created_at'),
+    )
+
+    def __init__(self, kind, payload=None, user_id=None, max_attempts=3, run_at=None):
+        self.kind = kind
+        self.payload = payload or {}
+        self.user_id = user_id
+        self.status = Job.QUEUED
+        self.attempts = 0
+        self.max_attempts = max_attempts
+        self.run_at = run_at or datetime.utcnow()
+
+    @property
+    def finished(self):
+        return self.status in (Job.SUCCEEDED, Job.FAILED)
+
+    @staticmethod
+    def get_user_jobs(user_id, limit=20):
+        """Get a user's most recent jobs, newest first."""
+        return Job.query.filter_by(user_id=user_id).order_by(
+            Job.created_at.desc(), Job.id.desc()
+        ).limit(limit).all()
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} {self.status}>'
+
+    def to_dict(self):
+        """Convert job to dictionary. The payload is left out; it holds server paths."""
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'run_at': self.run_at.isoformat(),
+            'started_at': self.locked_at.isoformat() if self.locked_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
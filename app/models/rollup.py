@@ -0,0 +1,215 @@
+from app import db
+from datetime import datetime
+from sqlalchemy import Index
+
+class ExpenseRollup(db.Model):
+    """Per-user monthly spending totals, maintained alongside the expenses table."""
+
+    __tablename__ = 'expense_rollups'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Integer, nullable=False)
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False)
+    total = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index('ux_expense_rollups_key', 'user_id', 'year', 'month', 'category_id', unique=True),
+    )
+
+    def __init__(self, user_id, year, month, category_id, total=0, count=0):
+        self.user_id = user_id
+        self.year = year
+        self.month = month
+        self.category_id = category_id
+        self.total = total
+        self.count = count
+
+    @staticmethod
+    def collect_deltas(rows, sign=1):
+        """Fold (user_id, category_id, date, amount) rows into per-bucket deltas."""
+        deltas = {}
+        for user_id, category_id, expense_date, amount in rows:
+            key = (user_id, expense_date.year, expense_date.month, int(category_id))
+            total, count = deltas.get(key, (0.0, 0))
+            deltas[key] = (total + sign * float(amount), count + sign)
+        return deltas
+
+    @staticmethod
+    def apply_deltas(deltas):
+        """Apply bucket deltas in the current transaction (the caller commits).
+
+        Each bucket is added with an upsert, so two writers creating the same
+        new bucket at once both land instead of one failing on
+        ux_expense_rollups_key. Buckets are written in key order so that
+        concurrent writers lock them in the same order.
+        """
+        if not deltas:
+            return
+
+        now = datetime.utcnow()
+        rows = [
+            {
+                'user_id': user_id,
+                'year': year,
+                'month': month,
+                'category_id': category_id,
+                'total': total,
+                'count': count,
+                'updated_at': now
+            }
+            for (user_id, year, month, category_id), (total, count) in sorted(deltas.items())
+        ]
+
+        table = ExpenseRollup.__table__
+        dialect = db.session.get_bind().dialect.name
+
+        if dialect in ('sqlite', 'postgresql'):
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+
+            statement = insert(table)
+            statement = statement.on_conflict_do_update(
+                index_elements=['user_id', 'year', 'month', 'category_id'],
+                set_={
+                    'total': table.c.total + statement.excluded.total,
+                    'count': table.c.count + statement.excluded.count,
+                    'updated_at': statement.excluded.updated_at
+                }
+            )
+            db.session.execute(statement, rows)
+        elif dialect in ('mysql', 'mariadb'):
+            from sqlalchemy.dialects.mysql import insert
+
+            statement = insert(table)
+            statement = statement.on_duplicate_key_update(
+                total=table.c.total + statement.inserted.total,
+                count=table.c.count + statement.inserted.count,
+                updated_at=statement.inserted.updated_at
+            )
+            db.session.execute(statement, rows)
+        else:
+            for row in rows:
+                ExpenseRollup._add_to_bucket(row)
+
+    @staticmethod
+    def _add_to_bucket(row):
+        """Update-or-insert one bucket, retrying the update if a concurrent insert wins."""
+        from sqlalchemy.exc import IntegrityError
+
+        bucket = ExpenseRollup.query.filter_by(
+            user_id=row['user_id'], year=row['year'], month=row['month'], category_id=row['category_id']
+        )
+        changes = {
+            ExpenseRollup.total: ExpenseRollup.total + row['total'],
+            ExpenseRollup.count: ExpenseRollup.count + row['count'],
+            ExpenseRollup.updated_at: row['updated_at']
+        }
+
+        if bucket.update(changes, synchronize_session=False):
+            return
+
+        try:
+            with db.session.begin_nested():
+                db.session.execute(ExpenseRollup.__table__.insert(), [row])
+        except IntegrityError:
+            bucket.update(changes, synchronize_session=False)
+
+    @staticmethod
+    def record(rows, sign=1):
+        """Record added (sign=1) or deleted (sign=-1) expense rows."""
+        ExpenseRollup.apply_deltas(ExpenseRollup.collect_deltas(rows, sign))
+
+    @staticmethod
+    def _raw_totals(user_id=None):
+        """Aggregate the raw expenses table into rollup buckets."""
+        from sqlalchemy import func, extract
+        from app.models.expense import Expense
+
+        year = extract('year', Expense.date)
+        month = extract('month', Expense.date)
+
+        query = db.session.query(
+            Expense.user_id,
+            year.label('year'),
+            month.label('month'),
+            Expense.category_id,
+            func.sum(Expense.amount).label('total'),
+            func.count(Expense.id).label('count')
+        )
+
+        if user_id:
+            query = query.filter(Expense.user_id == user_id)
+
+        return query.group_by(Expense.user_id, year, month, Expense.category_id).all()
+
+    @staticmethod
+    def rebuild(user_id=None):
+        """Recompute rollups from the raw expenses (the caller commits).
+
+        Bumps data_version for every user whose rollups were rebuilt, so
+        ETags and cached aggregates built from the old buckets go stale.
+        """
+        from app.models.user import User
+
+        delete_query = ExpenseRollup.query
+        if user_id:
+            delete_query = delete_query.filter_by(user_id=user_id)
+        user_ids = {row.user_id for row in delete_query.with_entities(ExpenseRollup.user_id).distinct()}
+        delete_query.delete(synchronize_session=False)
+
+        rows = [
+            {
+                'user_id': row.user_id,
+                'year': int(row.year),
+                'month': int(row.month),
+                'category_id': row.category_id,
+                'total': row.total,
+                'count': row.count,
+                'updated_at': datetime.utcnow()
+            }
+            for row in ExpenseRollup._raw_totals(user_id)
+        ]
+
+        if rows:
+            db.session.execute(ExpenseRollup.__table__.insert(), rows)
+
+        User.bump_data_versions(user_ids | {row['user_id'] for row in rows})
+        return len(rows)
+
+    @staticmethod
+    def verify(user_id=None):
+        """Compare rollups against the raw expenses and return mismatched buckets."""
+        expected = {
+            (row.user_id, int(row.year), int(row.month), row.category_id): (round(float(row.total), 2), row.count)
+            for row in ExpenseRollup._raw_totals(user_id)
+        }
+
+        query = ExpenseRollup.query
+        if user_id:
+            query = query.filter_by(user_id=user_id)
+
+        actual = {}
+        for rollup in query.all():
+            if rollup.count or rollup.total:
+                key = (rollup.user_id, rollup.year, rollup.month, rollup.category_id)
+                actual[key] = (round(float(rollup.total), 2), rollup.count)
+
+        mismatches = []
+        for key in sorted(set(expected) | set(actual)):
+            if expected.get(key) != actual.get(key):
+                mismatches.append({
+                    'key': key,
+                    'expected': expected.get(key),
+                    'actual': actual.get(key)
+                })
+
+        return mismatches
+
+    def __repr__(self):
+        return f'<ExpenseRollup {self.user_id} {self.year}-{self.month:02d} {self.category_id}>'
@@ -0,0 +1,59 @@
+from app import db
+from datetime import datetime
+from sqlalchemy import Index
+
+class Tombstone(db.Model):
+    """Record of a deleted row, so sync clients can learn about deletes."""
+
+    __tablename__ = 'tombstones'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    entity = db.Column(db.String(20), nullable=False)  # 'expense' or 'category'
+    entity_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        # Sync reads a user's tombstones in id order after the client's token
+        Index('ix_tombstones_user_id', 'user_id', 'id'),
+    )
+
+    @staticmethod
+    def record(user_id, entity, entity_ids):
+        """Add tombstones for deleted rows in the caller's transaction; the caller commits."""
+        now = datetime.utcnow()
+        rows = [
+            {'user_id': user_id, 'entity': entity, 'entity_id': entity_id, 'deleted_at': now}
+            for entity_id in entity_ids
+        ]
+        if rows:
+            db.session.execute(Tombstone.__table__.insert(), rows)
+
+    @staticmethod
+    def get_since(user_id, after_id=0, limit=500):
+        """Get up to limit tombstones for a user with id greater than after_id."""
+        return Tombstone.query.filter(
+            Tombstone.user_id == user_id, Tombstone.id > after_id
+        ).order_by(Tombstone.id).limit(limit).all()
+
+    @staticmethod
+    def get_last_id(user_id):
+        """Get the id of the user's newest tombstone, or 0."""
+        from sqlalchemy import func
+        return db.session.query(func.max(Tombstone.id)).filter(Tombstone.user_id == user_id).scalar() or 0
+
+    @staticmethod
+    def get_first_id_since(user_id, since):
+        """Get the id of the user's oldest tombstone stamped after since, or None."""
+        from sqlalchemy import func
+        return db.session.query(func.min(Tombstone.id)).filter(
+            Tombstone.user_id == user_id, Tombstone.deleted_at > since
+        ).scalar()
+
+    @staticmethod
+    def prune(before):
+        """Delete tombstones older than before. Returns the number removed; the caller commits."""
+        return Tombstone.query.filter(Tombstone.deleted_at < before).delete(synchronize_session=False)
+
+    def __repr__(self):
+        return f'<Tombstone {self.entity} {self.entity_id}>'
@@ -1,5 +1,5 @@
 from app import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.security import password_hasher
 from datetime import datetime
 
 class User(db.Model):
@@ -13,6 +13,7 @@ class User(db.Model):
     password_hash = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Relationships
     expenses = db.relationship('Expense', backref='user', lazy='dynamic', cascade='all, delete-orphan')
@@ -25,11 +26,69 @@ class User(db.Model):
     
     def set_password(self, password):
         """Set password hash."""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
         """Check if provided password matches hash."""
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+    
+    def needs_rehash(self):
+        """Check if the stored hash predates the configured hash parameters."""
+        return password_hasher.needs_rehash(self.password_hash)
+    
+    @staticmethod
+    def bulk_create(records):
+        """Insert many users plus their default categories in the current transaction.
+        
+        Each record is a dict with username, email and either password or a
+        precomputed password_hash (hashing dominates the cost, so migrations
+        should pass hashes). Returns the new user ids; the caller commits.
+        """
+        from app.models.category import Category
+        
+        if not records:
+            return []
+        
+        now = datetime.utcnow()
+        rows = []
+        for record in records:
+            password_hash = record.get('password_hash') or password_hasher.hash(record['password'])
+            rows.append({
+                'username': record['username'],
+                'email': record['email'],
+                'password_hash': password_hash,
+                'created_at': now,
+                'updated_at': now
+            })
+        
+        db.session.execute(User.__table__.insert(), rows)
+        
+        usernames = [row['username'] for row in rows]
+        user_ids = [user_id for (user_id,) in db.session.query(User.id).filter(User.username.in_(usernames))]
+        Category.provision_user_categories(user_ids)
+        
+        return user_ids
+    
+    @staticmethod
+    def bump_data_version(user_id):
+        """Increment the user's write counter in the current transaction."""
+        User.query.filter_by(id=user_id).update(
+            {User.data_version: User.data_version + 1}, synchronize_session=False
+        )
+    
+    @staticmethod
+    def bump_data_versions(user_ids):
+        """Increment the write counter of several users in the current transaction."""
+        user_ids = sorted(set(user_ids) - {None})
+        if user_ids:
+            User.query.filter(User.id.in_(user_ids)).update(
+                {User.data_version: User.data_version + 1}, synchronize_session=False
+            )
+    
+    @staticmethod
+    def get_data_version(user_id):
+        """Get the user's write counter, or None if the user does not exist."""
+        return db.session.query(User.data_version).filter_by(id=user_id).scalar()
     
     def get_total_expenses(self):
         """Get total number of expenses for this user."""
@@ -43,16 +102,17 @@ class User(db.Model):
     
     def get_monthly_total(self, year=None, month=None):
         """Get total spending for a specific month."""
-        from sqlalchemy import func, extract
+        from sqlalchemy import func
+        from app.models.rollup import ExpenseRollup
         if year is None:
             year = datetime.now().year
         if month is None:
             month = datetime.now().month
             
-        result = db.session.query(func.sum(Expense.amount)).filter(
-            Expense.user_id == self.id,
-            extract('year', Expense.date) == year,
-            extract('month', Expense.date) == month
+        result = db.session.query(func.sum(ExpenseRollup.total)).filter(
+            ExpenseRollup.user_id == self.id,
+            ExpenseRollup.year == year,
+            ExpenseRollup.month == month
         ).scalar()
         return result or 0.0
     
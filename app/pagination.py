@@ -0,0 +1,41 @@
+import base64
+import json
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+def encode_cursor(direction, values):
+    """Pack a direction ('next'/'prev') and sort-key values into an opaque token."""
+    payload = json.dumps([direction] + list(values), separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(token):
+    """Unpack a token produced by encode_cursor into (direction, values)."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        direction, values = payload[0], payload[1:]
+    except (ValueError, TypeError, IndexError, UnicodeError):
+        raise InvalidCursor('Malformed pagination cursor')
+
+    if direction not in ('next', 'prev'):
+        raise InvalidCursor('Malformed pagination cursor')
+
+    return direction, values
+
+class KeysetPage:
+    """One page of keyset-paginated results."""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None, total=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
@@ -0,0 +1,62 @@
+from datetime import datetime
+from sqlalchemy import event
+from app import db
+
+# Tables whose reads must seek an index rather than scan
+CHECKED_TABLES = ('expenses', 'expense_rollups', 'categories', 'tombstones')
+
+def aggregate_queries(user, category):
+    """Map a name to a callable for each aggregate query whose plan is checked."""
+    from app.models import Expense
+    from app.services import get_sync_changes
+
+    user_id = user.id
+    now = datetime.now()
+
+    return {
+        'User.get_monthly_total': lambda: user.get_monthly_total(now.year, now.month),
+        'Category.get_total_amount': lambda: category.get_total_amount(user_id, now.year, now.month),
+        'Expense.get_monthly_expenses': lambda: Expense.get_monthly_expenses(user_id, now.year, now.month),
+        'Expense.get_category_totals': lambda: Expense.get_category_totals(user_id, now.year, now.month),
+        'Expense.get_category_totals (date range)': lambda: Expense.get_category_totals(
+            user_id, date_from=now.date().replace(day=1), date_to=now.date()
+        ),
+        'Expense.get_monthly_chart_data': lambda: Expense.get_monthly_chart_data(user_id, months=6),
+        'get_sync_changes': lambda: get_sync_changes(user_id),
+    }
+
+def plan_table(step):
+    """Table named by an EXPLAIN QUERY PLAN step."""
+    # Older SQLite versions print "SCAN TABLE expenses", newer ones "SCAN expenses"
+    words = step.split()
+    return words[2] if len(words) > 2 and words[1] == 'TABLE' else words[1]
+
+def check_query_plans(user, category):
+    """Run the aggregate queries for a user and explain every statement they issue.
+
+    Returns a list of (name, ok, plan steps), one per statement; ok is false
+    when the plan scans a checked table or never searches one. SQLite only.
+    """
+    results = []
+
+    for name, run_aggregate in aggregate_queries(user, category).items():
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+
+        event.listen(db.engine, 'before_cursor_execute', capture)
+        try:
+            run_aggregate()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', capture)
+
+        with db.engine.connect() as conn:
+            for statement, parameters in statements:
+                plan = [row[-1] for row in conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)]
+                scans = [step for step in plan if step.startswith('SCAN') and plan_table(step) in CHECKED_TABLES]
+                searches = [step for step in plan if step.startswith('SEARCH') and plan_table(step) in CHECKED_TABLES]
+                results.append((name, not scans and bool(searches), plan))
+
+    db.session.rollback()
+    return results
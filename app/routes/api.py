@@ -1,18 +1,61 @@
-from flask import Blueprint, jsonify, session, request
-from app.models import User, Expense
+from flask import Blueprint, Response, current_app, jsonify, make_response, session, request, stream_with_context, g, url_for
+from app.models import User, Expense, Job
+from app import cache
+from app.services import get_cached_expense_summary, import_expenses, ImportFileError, export_expenses, EXPORT_FORMATS, apply_expense_batch, BatchTooLarge, get_sync_changes, SyncTokenExpired
 from app.routes.main import login_required
-from datetime import datetime
+from app.instrumentation import metrics
+from app.concurrency import gather_queries
+from app.jobs import enqueue, save_upload, discard_upload
+from app.pagination import InvalidCursor
+from app.utils import parse_date
+from datetime import date, datetime
 import calendar
+import hashlib
+import io
 
 api_bp = Blueprint('api', __name__)
 
-@api_bp.route('/monthly-chart')
-@login_required
-def monthly_chart():
-    """API endpoint for monthly spending chart data."""
-    try:
+MAX_ANALYTICS_DAYS = 366 * 50
+
+def conditional_on_data_version(f):
+    """Serve 304 Not Modified when the user's data has not changed.
+    
+    The strong ETag combines the user's write counter with the request URL
+    and today's date (month-relative payloads roll over with the calendar),
+    so a matching If-None-Match skips the view and its aggregate queries.
+    """
+    from functools import wraps
+    
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        view = current_app.ensure_sync(f)
         user_id = session['user_id']
+        version = User.get_data_version(user_id)
+        cache.remember_version(user_id, version)
         
+        if version is None:
+            return view(*args, **kwargs)
+        
+        digest = hashlib.sha1(
+            f"{request.full_path}|{datetime.now():%Y-%m-%d}".encode('utf-8')
+        ).hexdigest()[:16]
+        etag = f"u{user_id}.v{version}.{digest}"
+        
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return decorated_function
+
+def get_monthly_chart(user_id):
+    """Last 6 months of spending in the shape Chart.js expects, cached per user."""
+    def build_chart():
         # Get monthly data for the last 6 months
         monthly_data = Expense.get_monthly_chart_data(user_id, months=6)
         
@@ -32,11 +75,23 @@ def monthly_chart():
             months.append(month_year)
             amounts.append(amount)
         
-        return jsonify({
-            'months': months,
-            'amounts': amounts,
-            'success': True
-        })
+        return {'months': months, 'amounts': amounts}
+    
+    return cache.get_or_set(user_id, f"monthly-chart:6:{datetime.now():%Y-%m}", build_chart)
+
+def get_recent_expense_dicts(user_id, limit=10):
+    """Most recent expenses, serialized."""
+    return [expense.to_summary_dict() for expense in Expense.get_recent_expenses(user_id, limit=limit)]
+
+@api_bp.route('/monthly-chart')
+@login_required
+@conditional_on_data_version
+def monthly_chart():
+    """API endpoint for monthly spending chart data."""
+    try:
+        chart = get_monthly_chart(session['user_id'])
+        
+        return jsonify({**chart, 'success': True})
         
     except Exception as e:
         return jsonify({
@@ -46,50 +101,19 @@ def monthly_chart():
 
 @api_bp.route('/expense-summary')
 @login_required
+@conditional_on_data_version
 def expense_summary():
     """API endpoint for expense summary data."""
     try:
-        user_id = session['user_id']
-        user = User.query.get(user_id)
+        summary = get_cached_expense_summary(g.user.id)
         
-        if not user:
+        if not summary:
             return jsonify({
                 'error': 'User not found',
                 'success': False
             }), 404
         
-        # Get current month data
-        now = datetime.now()
-        monthly_total = user.get_monthly_total(now.year, now.month)
-        total_expenses = user.get_total_expenses()
-        total_amount = user.get_total_amount()
-        
-        # Get category totals for current month
-        category_totals = Expense.get_category_totals(user_id, now.year, now.month)
-        
-        # Format category data
-        categories = []
-        for cat in category_totals:
-            if cat.total > 0:  # Only include categories with expenses
-                percentage = (float(cat.total) / float(monthly_total) * 100) if monthly_total > 0 else 0
-                categories.append({
-                    'id': cat.id,
-                    'name': cat.name,
-                    'icon': cat.icon,
-                    'color': cat.color,
-                    'total': float(cat.total),
-                    'percentage': round(percentage, 1)
-                })
-        
-        return jsonify({
-            'monthly_total': float(monthly_total),
-            'total_expenses': total_expenses,
-            'total_amount': float(total_amount),
-            'categories': categories,
-            'month': calendar.month_name[now.month],
-            'year': now.year,
-            'success': True
-        })
+        return jsonify({**summary.to_dict(), 'success': True})
         
     except Exception as e:
         return jsonify({
@@ -99,27 +123,14 @@ def expense_summary():
 
 @api_bp.route('/recent-expenses')
 @login_required
+@conditional_on_data_version
 def recent_expenses():
     """API endpoint for recent expenses."""
     try:
         user_id = session['user_id']
         limit = request.args.get('limit', 10, type=int)
         
-        expenses = Expense.get_recent_expenses(user_id, limit=limit)
-        
-        expenses_data = []
-        for expense in expenses:
-            expenses_data.append({
-                'id': expense.id,
-                'amount': float(expense.amount),
-                'description': expense.description,
-                'date': expense.date.isoformat(),
-                'category': {
-                    'name': expense.category.name,
-                    'icon': expense.category.icon,
-                    'color': expense.category.color
-                } if expense.category else None
-            })
+        expenses_data = get_recent_expense_dicts(user_id, limit=limit)
         
         return jsonify({
             'expenses': expenses_data,
@@ -132,6 +143,470 @@ def recent_expenses():
             'success': False
         }), 500
 
+@api_bp.route('/dashboard')
+@login_required
+@conditional_on_data_version
+async def dashboard():
+    """API endpoint bundling the summary, chart and recent expenses for dashboard pollers.
+    
+    With API_CONCURRENT_QUERIES the three independent aggregates run
+    concurrently, so the response takes about as long as the slowest one.
+    """
+    try:
+        user_id = session['user_id']
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+        app = current_app._get_current_object()
+        
+        summary, chart, recent = await gather_queries(
+            app,
+            lambda: get_cached_expense_summary(user_id),
+            lambda: get_monthly_chart(user_id),
+            lambda: get_recent_expense_dicts(user_id, limit),
+            concurrent=app.config.get('API_CONCURRENT_QUERIES', False)
+        )
+        
+        if not summary:
+            return jsonify({
+                'error': 'User not found',
+                'success': False
+            }), 404
+        
+        return jsonify({
+            'summary': summary.to_dict(),
+            'chart': chart,
+            'expenses': recent,
+            'success': True
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'error': 'Failed to load dashboard data',
+            'success': False
+        }), 500
+
+@api_bp.route('/category-totals')
+@login_required
+@conditional_on_data_version
+def category_totals():
+    """API endpoint for per-category spending over a month or a date range."""
+    try:
+        user_id = session['user_id']
+        
+        try:
+            date_from = parse_date(request.args.get('from'))
+            date_to = parse_date(request.args.get('to'))
+        except ValueError:
+            return jsonify({
+                'error': 'Invalid date format',
+                'success': False
+            }), 400
+        
+        if date_from or date_to:
+            key = f"category-totals:{date_from}:{date_to}"
+            load = lambda: Expense.get_category_totals(user_id, date_from=date_from, date_to=date_to)
+        else:
+            now = datetime.now()
+            year = request.args.get('year', now.year, type=int)
+            month = request.args.get('month', now.month, type=int)
+            if not 1 <= month <= 12:
+                return jsonify({
+                    'error': 'month must be between 1 and 12',
+                    'success': False
+                }), 400
+            key = f"category-totals:{year}-{month:02d}"
+            load = lambda: Expense.get_category_totals(user_id, year, month)
+        
+        categories = cache.get_or_set(user_id, key, lambda: [
+            {'id': row.id, 'name': row.name, 'icon': row.icon, 'color': row.color, 'total': float(row.total)}
+            for row in load()
+        ])
+        
+        return jsonify({
+            'categories': categories,
+            'success': True
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'error': 'Failed to load category totals',
+            'success': False
+        }), 500
+
+@api_bp.route('/analytics')
+@login_required
+@conditional_on_data_version
+def analytics():
+    """API endpoint for gap-filled spending trends over an arbitrary date range."""
+    # NumPy is only loaded once analytics are first requested
+    from app.services.analytics import get_expense_analytics, MAX_WINDOW
+    
+    try:
+        user_id = session['user_id']
+        
+        try:
+            date_to = parse_date(request.args.get('to')) or date.today()
+            date_from = parse_date(request.args.get('from'))
+        except ValueError:
+            return jsonify({
+                'error': 'Invalid date format',
+                'success': False
+            }), 400
+        
+        if date_from is None:
+            # Default to the last 12 months including the current one
+            start_month = date_to.year * 12 + date_to.month - 12
+            date_from = date(start_month // 12, start_month % 12 + 1, 1)
+        
+        if date_from > date_to:
+            return jsonify({
+                'error': 'from must not be after to',
+                'success': False
+            }), 400
+        
+        if (date_to - date_from).days > MAX_ANALYTICS_DAYS:
+            return jsonify({
+                'error': 'Date range is too long',
+                'success': False
+            }), 400
+        
+        window = request.args.get('window', 3, type=int)
+        if not 1 <= window <= MAX_WINDOW:
+            return jsonify({
+                'error': f'window must be between 1 and {MAX_WINDOW}',
+                'success': False
+            }), 400
+        
+        result = cache.get_or_set(
+            user_id,
+            f"analytics:{date_from}:{date_to}:{window}",
+            lambda: get_expense_analytics(user_id, date_from, date_to, window)
+        )
+        
+        return jsonify({**result, 'success': True})
+        
+    except Exception as e:
+        return jsonify({
+            'error': 'Failed to load analytics',
+            'success': False
+        }), 500
+
+@api_bp.route('/expenses')
+@login_required
+def list_expenses():
+    """API endpoint for cursor-paginated expenses."""
+    try:
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        count = request.args.get('count')
+        
+        try:
+            date_from = parse_date(request.args.get('date_from'))
+            date_to = parse_date(request.args.get('date_to'))
+        except ValueError:
+            return jsonify({
+                'error': 'Invalid date format',
+                'success': False
+            }), 400
+        
+        if count not in (None, 'exact', 'estimate'):
+            return jsonify({
+                'error': 'count must be "exact" or "estimate"',
+                'success': False
+            }), 400
+        
+        try:
+            page = Expense.get_user_expenses_page(
+                user_id=session['user_id'],
+                cursor=request.args.get('cursor') or None,
+                per_page=limit,
+                category_id=request.args.get('category', type=int),
+                date_from=date_from,
+                date_to=date_to,
+                count=count
+            )
+        except InvalidCursor:
+            return jsonify({
+                'error': 'Invalid cursor',
+                'success': False
+            }), 400
+        
+        return jsonify({
+            'expenses': [expense.to_summary_dict() for expense in page.items],
+            'next_cursor': page.next_cursor,
+            'prev_cursor': page.prev_cursor,
+            'total': page.total,
+            'success': True
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'error': 'Failed to load expenses',
+            'success': False
+        }), 500
+
+@api_bp.route('/expenses/search')
+@login_required
+def search_expenses():
+    """API endpoint for ranked full-text search over expense descriptions."""
+    try:
+        text = request.args.get('q', '').strip()
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        
+        if not text:
+            return jsonify({
+                'error': 'q is required',
+                'success': False
+            }), 400
+        
+        try:
+            date_from = parse_date(request.args.get('date_from'))
+            date_to = parse_date(request.args.get('date_to'))
+        except ValueError:
+            return jsonify({
+                'error': 'Invalid date format',
+                'success': False
+            }), 400
+        
+        try:
+            page = Expense.search_user_expenses(
+                user_id=session['user_id'],
+                text=text,
+                cursor=request.args.get('cursor') or None,
+                per_page=limit,
+                category_id=request.args.get('category', type=int),
+                date_from=date_from,
+                date_to=date_to,
+                count='exact' if request.args.get('count') == 'exact' else None
+            )
+        except InvalidCursor:
+            return jsonify({
+                'error': 'Invalid cursor',
+                'success': False
+            }), 400
+        
+        return jsonify({
+            'expenses': [expense.to_summary_dict() for expense in page.items],
+            'next_cursor': page.next_cursor,
+            'prev_cursor': page.prev_cursor,
+            'total': page.total,
+            'success': True
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'error': 'Failed to search expenses',
+            'success': False
+        }), 500
+
+@api_bp.route('/sync')
+@login_required
+def sync():
+    """API endpoint returning the expenses, categories and deletes changed since a token.
+    
+    Call without ``since`` for a full sync, then pass the returned token
+    back as ``since``; repeat while ``has_more`` is true.
+    """
+    try:
+        limit = request.args.get('limit', current_app.config.get('SYNC_PAGE_SIZE', 500), type=int)
+        limit = max(1, min(limit, current_app.config.get('SYNC_PAGE_SIZE', 500)))
+        
+        changes = get_sync_changes(
+            session['user_id'],
+            token=request.args.get('since') or None,
+            limit=limit,
+            retention_days=current_app.config.get('SYNC_TOMBSTONE_DAYS', 90),
+            safety_seconds=current_app.config.get('SYNC_SAFETY_SECONDS', 60)
+        )
+        
+        return jsonify({**changes, 'success': True})
+        
+    except InvalidCursor:
+        return jsonify({
+            'error': 'Invalid sync token',
+            'success': False
+        }), 400
+    except SyncTokenExpired as e:
+        return jsonify({
+            'error': str(e),
+            'success': False
+        }), 410
+    except Exception as e:
+        return jsonify({
+            'error': 'Failed to load changes',
+            'success': False
+        }), 500
+
+@api_bp.route('/expenses/batch', methods=['POST'])
+@login_required
+def batch_expenses():
+    """API endpoint for creating and deleting many expenses in one transaction.
+    
+    Body: {"create": [{category_id, amount, date, description, client_id}, ...],
+    "delete": [id, ...], "atomic": false}. Returns a result per item.
+    """
+    payload = request.get_json(silent=True)
+    
+    if not isinstance(payload, dict) or not isinstance(payload.get('create', []), list) \
+            or not isinstance(payload.get('delete', []), list):
+        return jsonify({
+            'error': 'Expected a JSON object with "create" and/or "delete" lists',
+            'success': False
+        }), 400
+    
+    try:
+        result = apply_expense_batch(
+            session['user_id'],
+            creates=payload.get('create', []),
+            deletes=payload.get('delete', []),
+            atomic=bool(payload.get('atomic', False)),
+            max_items=current_app.config.get('BATCH_MAX_ITEMS', 500)
+        )
+    except BatchTooLarge as e:
+        return jsonify({
+            'error': str(e),
+            'success': False
+        }), 413
+    except Exception as e:
+        return jsonify({
+            'error': 'Failed to apply batch',
+            'success': False
+        }), 500
+    
+    return jsonify({**result.to_dict(), 'success': not result.failed})
+
+@api_bp.route('/expenses/import', methods=['POST'])
+@login_required
+def import_expenses_file():
+    """API endpoint for bulk importing a bank CSV/OFX export.
+    
+    With ``background=true`` the file is queued as a job for 'flask worker'
+    and the response is 202 with the job; poll /api/jobs/<id> for the result.
+    """
+    upload = request.files.get('file')
+    
+    if not upload or not upload.filename:
+        return jsonify({
+            'error': 'No file uploaded',
+            'success': False
+        }), 400
+    
+    file_format = request.form.get('format') or upload.filename.rsplit('.', 1)[-1].lower()
+    batch_size = min(max(request.form.get('batch_size', 1000, type=int), 1), 10000)
+    
+    if request.form.get('background', '').lower() in ('1', 'true', 'yes'):
+        path = None
+        try:
+            # The job only carries the path; the file is spooled to disk
+            path = save_upload(upload)
+            job = enqueue('import_expenses', {
+                'user_id': session['user_id'],
+                'path': path,
+                'format': file_format,
+                'batch_size': batch_size,
+                'default_category': request.form.get('default_category') or None,
+                'expense_sign': request.form.get('expense_sign', 'negative')
+            }, user_id=session['user_id'], max_attempts=1)  # batches commit as they go, so never rerun
+        except Exception as e:
+            discard_upload(path)
+            return jsonify({
+                'error': 'Failed to queue the import',
+                'success': False
+            }), 500
+        
+        return jsonify({
+            'job': job.to_dict(),
+            'status_url': url_for('api.job_status', job_id=job.id),
+            'success': True
+        }), 202
+    
+    try:
+        # Decode the upload lazily so rows are parsed as they are read
+        stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', errors='replace', newline='')
+        result = import_expenses(
+            session['user_id'],
+            stream,
+            file_format=file_format,
+            batch_size=batch_size,
+            default_category=request.form.get('default_category') or None,
+            expense_sign=request.form.get('expense_sign', 'negative')
+        )
+    except ImportFileError as e:
+        return jsonify({
+            'error': str(e),
+            'success': False
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'error': 'Failed to import expenses',
+            'success': False
+        }), 500
+    
+    return jsonify({**result.to_dict(), 'success': True})
+
+@api_bp.route('/jobs')
+@login_required
+def jobs():
+    """API endpoint listing the user's recent background jobs."""
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    
+    return jsonify({
+        'jobs': [job.to_dict() for job in Job.get_user_jobs(session['user_id'], limit)],
+        'success': True
+    })
+
+@api_bp.route('/jobs/<int:job_id>')
+@login_required
+def job_status(job_id):
+    """API endpoint for the status and result of one background job."""
+    job = Job.query.filter_by(id=job_id, user_id=session['user_id']).first()
+    
+    if not job:
+        return jsonify({
+            'error': 'Job not found',
+            'success': False
+        }), 404
+    
+    return jsonify({'job': job.to_dict(), 'success': True})
+
+@api_bp.route('/expenses/export')
+@login_required
+def export_expenses_file():
+    """API endpoint streaming the user's full expense history as CSV or NDJSON."""
+    file_format = request.args.get('format', 'csv')
+    
+    if file_format not in EXPORT_FORMATS:
+        return jsonify({
+            'error': 'format must be "csv" or "ndjson"',
+            'success': False
+        }), 400
+    
+    try:
+        date_from = parse_date(request.args.get('date_from'))
+        date_to = parse_date(request.args.get('date_to'))
+    except ValueError:
+        return jsonify({
+            'error': 'Invalid date format',
+            'success': False
+        }), 400
+    
+    chunks = export_expenses(
+        session['user_id'],
+        file_format,
+        category_id=request.args.get('category', type=int),
+        date_from=date_from,
+        date_to=date_to
+    )
+    filename = f"expenses-{datetime.now().strftime('%Y%m%d')}.{file_format}"
+    
+    return Response(stream_with_context(chunks), mimetype=EXPORT_FORMATS[file_format], headers={
+        'Content-Disposition': f'attachment; filename="{filename}"',
+        'X-Accel-Buffering': 'no'
+    })
+
+@api_bp.route('/metrics')
+def metrics_endpoint():
+    """Per-blueprint request metrics in the Prometheus text format."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @api_bp.route('/health')
 def health_check():
     """API health check endpoint."""
@@ -1,7 +1,8 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
 from app import db
 from app.models import User, Category
-from werkzeug.security import check_password_hash
+from app.security import HasherBusy
+from app.sessions import UserSnapshot
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -77,9 +78,24 @@ def login():
             (User.username == username) | (User.email == username)
         ).first()
         
-        if user and user.check_password(password):
+        try:
+            authenticated = user is not None and user.check_password(password)
+            
+            # Upgrade hashes made with older parameters while we have the password
+            if authenticated and user.needs_rehash():
+                user.set_password(password)
+                db.session.commit()
+        except HasherBusy:
+            db.session.rollback()
+            flash('The server is busy, please try again in a moment.', 'error')
+            return render_template('login.html'), 503
+        
+        if authenticated:
+            session.clear()
+            session.rotate()  # new session id on login, against fixation
             session['user_id'] = user.id
             session['username'] = user.username
+            session['user'] = UserSnapshot.from_user(user)
             session.permanent = True
             
             flash(f'Welcome back, {user.username}!', 'success')
@@ -1,7 +1,9 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-from app import db
-from app.models import User, Category, Expense
+from app import db, cache
+from app.models import User, Category, Expense, ExpenseRollup, Tombstone
 from app.routes.main import login_required
+from app.pagination import InvalidCursor
+from app.utils import parse_date
 from datetime import datetime, date
 
 expenses_bp = Blueprint('expenses', __name__)
@@ -59,7 +61,11 @@ def add_expense():
             )
             
             db.session.add(expense)
+            ExpenseRollup.record([expense.rollup_row()])
+            Category.record_expenses([expense.rollup_row()])
+            User.bump_data_version(session['user_id'])
             db.session.commit()
+            cache.invalidate(session['user_id'])
             
             flash('Expense added successfully!', 'success')
             return redirect(url_for('main.dashboard'))
@@ -82,7 +88,8 @@ def add_expense():
 @login_required
 def list_expenses():
     """List all expenses with filtering and pagination."""
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor', '')
+    search = request.args.get('q', '').strip()
     category_filter = request.args.get('category', '')
     date_from = request.args.get('date_from', '')
     date_to = request.args.get('date_to', '')
@@ -92,31 +99,41 @@ def list_expenses():
     date_to_obj = None
     
     try:
-        if date_from:
-            date_from_obj = datetime.strptime(date_from, '%Y-%m-%d').date()
-        if date_to:
-            date_to_obj = datetime.strptime(date_to, '%Y-%m-%d').date()
+        date_from_obj = parse_date(date_from)
+        date_to_obj = parse_date(date_to)
     except ValueError:
         flash('Invalid date format!', 'error')
     
-    # Get expenses with filters
-    expenses_pagination = Expense.get_user_expenses(
+    # Get expenses with filters, keyed on the last row seen rather than an offset
+    filters = dict(
         user_id=session['user_id'],
-        page=page,
         per_page=20,
         category_id=int(category_filter) if category_filter else None,
         date_from=date_from_obj,
         date_to=date_to_obj
     )
     
+    if search:
+        # Ranked full-text matches instead of the date-ordered list
+        get_page = lambda **kwargs: Expense.search_user_expenses(text=search, count='exact', **kwargs)
+    else:
+        get_page = lambda **kwargs: Expense.get_user_expenses_page(count='estimate', **kwargs)
+    
+    try:
+        expenses_page = get_page(cursor=cursor or None, **filters)
+    except InvalidCursor:
+        flash('Invalid page link, showing the first page.', 'error')
+        expenses_page = get_page(**filters)
+    
     # Get categories for filter dropdown
     categories = Category.get_user_categories(session['user_id'])
     
     return render_template('expenses.html',
-                         expenses=expenses_pagination.items,
-                         pagination=expenses_pagination,
+                         expenses=expenses_page.items,
+                         pagination=expenses_page,
                          categories=categories,
                          category_filter=category_filter,
+                         search=search,
                          date_from=date_from,
                          date_to=date_to)
 
@@ -133,8 +150,13 @@ def delete_expense(expense_id):
         if not expense:
             flash('Expense not found!', 'error')
         else:
+            ExpenseRollup.record([expense.rollup_row()], sign=-1)
+            Category.record_expenses([expense.rollup_row()], sign=-1)
+            Tombstone.record(expense.user_id, 'expense', [expense.id])
             db.session.delete(expense)
+            User.bump_data_version(session['user_id'])
             db.session.commit()
+            cache.invalidate(session['user_id'])
             flash('Expense deleted successfully!', 'success')
             
     except Exception as e:
@@ -187,7 +209,9 @@ def add_category():
         )
         
         db.session.add(category)
+        User.bump_data_version(session['user_id'])
         db.session.commit()
+        cache.invalidate(session['user_id'])
         
         flash('Category added successfully!', 'success')
         
@@ -1,7 +1,6 @@
-from flask import Blueprint, render_template, redirect, url_for, session
-from app.models import User, Expense, Category
-from datetime import datetime
-import calendar
+from flask import Blueprint, current_app, render_template, redirect, url_for, session, g
+from app.models import Expense
+from app.services import get_cached_expense_summary
 
 main_bp = Blueprint('main', __name__)
 
@@ -11,15 +10,19 @@ def login_required(f):
     
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
+        user = session.get('user')
+        if user is None:
             return redirect(url_for('auth.login'))
-        return f(*args, **kwargs)
+        
+        # Snapshot stored at login; saves a users lookup on every request
+        g.user = user
+        return current_app.ensure_sync(f)(*args, **kwargs)
     return decorated_function
 
 @main_bp.route('/')
 def index():
     """Home page - redirect to dashboard if logged in, otherwise to login."""
-    if 'user_id' in session:
+    if 'user' in session:
         return redirect(url_for('main.dashboard'))
     return redirect(url_for('auth.login'))
 
@@ -27,36 +30,26 @@ def index():
 @login_required
 def dashboard():
     """Main dashboard showing expense overview."""
-    user_id = session['user_id']
-    user = User.query.get(user_id)
+    user_id = g.user.id
+    summary = get_cached_expense_summary(user_id)
     
-    if not user:
+    if not summary:
         session.clear()
         return redirect(url_for('auth.login'))
     
-    # Get current date info
-    now = datetime.now()
-    current_year = now.year
-    current_month = now.month
-    
     # Get recent expenses
     recent_expenses = Expense.get_recent_expenses(user_id, limit=10)
     
-    # Get monthly total
-    monthly_total = user.get_monthly_total(current_year, current_month)
-    
-    # Get category totals for current month
-    category_totals = Expense.get_category_totals(user_id, current_year, current_month)
+    # Category totals for the current month
+    category_totals = summary.categories
     category_stats = category_totals  # Alias for template compatibility
     
-    # Get month name
-    month_name = calendar.month_name[current_month]
-    current_month_year = f"{month_name} {current_year}"
+    current_month_year = f"{summary.month_name} {summary.year}"
     
     return render_template('dashboard.html',
-                         user=user,
+                         summary=summary,
                          recent_expenses=recent_expenses,
-                         monthly_total=monthly_total,
+                         monthly_total=summary.monthly_total,
                          category_totals=category_totals,
                          category_stats=category_stats,
                          current_month=current_month_year)
@@ -65,18 +58,13 @@ def dashboard():
 @login_required
 def profile():
     """User profile page."""
-    user_id = session['user_id']
-    user = User.query.get(user_id)
+    summary = get_cached_expense_summary(g.user.id)
     
-    if not user:
+    if not summary:
         session.clear()
         return redirect(url_for('auth.login'))
     
-    # Get user statistics
-    total_expenses = user.get_total_expenses()
-    total_amount = user.get_total_amount()
-    
     return render_template('profile.html',
-                         user=user,
-                         total_expenses=total_expenses,
-                         total_amount=total_amount)
\ No newline at end of file
+                         user=g.user,
+                         total_expenses=summary.total_expenses,
+                         total_amount=summary.total_amount)
\ No newline at end of file
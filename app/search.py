@@ -0,0 +1,93 @@
+import re
+from sqlalchemy import Column, DDL, Integer, MetaData, Table, Text, event, func
+
+# External-content FTS5 table over expenses.description. Triggers keep it in
+# step with every write path, including Core bulk inserts that bypass the ORM.
+SQLITE_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS expenses_fts USING fts5(
+        description,
+        content='expenses',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS expenses_fts_insert AFTER INSERT ON expenses BEGIN
+        INSERT INTO expenses_fts(rowid, description) VALUES (new.id, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS expenses_fts_delete AFTER DELETE ON expenses BEGIN
+        INSERT INTO expenses_fts(expenses_fts, rowid, description) VALUES ('delete', old.id, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS expenses_fts_update AFTER UPDATE OF description ON expenses BEGIN
+        INSERT INTO expenses_fts(expenses_fts, rowid, description) VALUES ('delete', old.id, old.description);
+        INSERT INTO expenses_fts(rowid, description) VALUES (new.id, new.description);
+    END""",
+)
+
+# PostgreSQL keeps an expression GIN index current by itself
+POSTGRES_DDL = (
+    """CREATE INDEX IF NOT EXISTS ix_expenses_description_tsv ON expenses
+        USING gin (to_tsvector('simple', coalesce(description, '')))""",
+)
+
+# Lightweight handle for querying the FTS table; deliberately not part of
+# db.metadata, so create_all never tries to create it as a regular table
+expenses_fts = Table(
+    'expenses_fts', MetaData(),
+    Column('rowid', Integer),
+    Column('expenses_fts', Text),
+    Column('description', Text),
+    Column('rank'),
+)
+
+TERM_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+def register_search_ddl(table):
+    """Create (and drop) the search index together with the expenses table."""
+    for statement in SQLITE_DDL:
+        event.listen(table, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+    for statement in POSTGRES_DDL:
+        event.listen(table, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+    event.listen(table, 'before_drop', DDL('DROP TABLE IF EXISTS expenses_fts').execute_if(dialect='sqlite'))
+
+def ensure_search_index(connection):
+    """Create the search index on an existing database and rebuild its contents."""
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_DDL:
+            connection.exec_driver_sql(statement)
+        connection.exec_driver_sql("INSERT INTO expenses_fts(expenses_fts) VALUES ('rebuild')")
+    elif dialect == 'postgresql':
+        for statement in POSTGRES_DDL:
+            connection.exec_driver_sql(statement)
+    return dialect
+
+def search_terms(text):
+    """Split free text into word terms, dropping FTS syntax characters."""
+    return TERM_PATTERN.findall(text or '')
+
+def apply_search(query, model, text, dialect):
+    """Restrict an Expense query to descriptions matching every term.
+
+    Returns (query, rank) where ordering by rank ascending puts the best
+    matches first. Terms match as prefixes on SQLite, so 'star' finds
+    'Starbucks'.
+    """
+    terms = search_terms(text)
+
+    if dialect == 'sqlite':
+        match = ' '.join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+        query = query.join(expenses_fts, expenses_fts.c.rowid == model.id).filter(
+            expenses_fts.c.expenses_fts.op('MATCH')(match)
+        )
+        return query, expenses_fts.c.rank
+
+    if dialect == 'postgresql':
+        document = func.to_tsvector('simple', func.coalesce(model.description, ''))
+        ts_query = func.plainto_tsquery('simple', ' '.join(terms))
+        query = query.filter(document.op('@@')(ts_query))
+        return query, -func.ts_rank(document, ts_query)
+
+    # Other databases: unindexed substring match, newest first
+    for term in terms:
+        query = query.filter(model.description.contains(term, autoescape=True))
+    return query, None
@@ -0,0 +1,93 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+from app.instrumentation import metrics
+
+# Parameters Werkzeug fills in when a method string leaves them out
+METHOD_DEFAULTS = {
+    'pbkdf2': ['sha256', str(DEFAULT_PBKDF2_ITERATIONS)],
+    'scrypt': ['32768', '8', '1'],
+}
+
+metrics.describe('password_hash_queue_seconds', 'Time a password hash waited for a pool thread.')
+metrics.describe('password_hash_seconds', 'Time spent computing a password hash.')
+metrics.describe('password_hash_rejected_total', 'Hash requests refused because the queue was full.')
+
+def normalize_method(method):
+    """Expand a method like 'scrypt' to the full 'scrypt:32768:8:1' stored in hashes."""
+    name, *params = method.split(':')
+    defaults = METHOD_DEFAULTS.get(name, [])
+    return ':'.join([name] + params + defaults[len(params):])
+
+class HasherBusy(RuntimeError):
+    """Raised when too many password hashes are already queued."""
+
+class PasswordHasher:
+    """Password hashing on a bounded thread pool.
+
+    Hashing is CPU-bound, so a login burst would otherwise occupy every
+    request thread at once. The pool caps concurrent hashes at
+    PASSWORD_HASH_WORKERS, and at most PASSWORD_HASH_MAX_PENDING requests may
+    wait for it; beyond that callers get HasherBusy instead of queueing.
+    hashlib releases the GIL while hashing, so threads are enough.
+    """
+
+    def __init__(self, app=None):
+        self.method = normalize_method('pbkdf2')
+        self.salt_length = 16
+        self.queue_timeout = 5.0
+        self._executor = None
+        self._slots = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.method = normalize_method(app.config.get('PASSWORD_HASH_METHOD', self.method))
+        self.salt_length = app.config.get('PASSWORD_SALT_LENGTH', self.salt_length)
+        self.queue_timeout = app.config.get('PASSWORD_HASH_QUEUE_TIMEOUT', self.queue_timeout)
+
+        workers = app.config.get('PASSWORD_HASH_WORKERS', 4)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash') if workers else None
+        self._slots = threading.BoundedSemaphore(workers + app.config.get('PASSWORD_HASH_MAX_PENDING', 32))
+
+        app.extensions['password_hasher'] = self
+
+    def _run(self, operation, *args):
+        if self._executor is None:
+            return operation(*args)
+
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            metrics.inc('password_hash_rejected_total')
+            raise HasherBusy('Too many password checks in progress')
+
+        submitted = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            metrics.observe('password_hash_queue_seconds', started - submitted)
+            try:
+                return operation(*args)
+            finally:
+                metrics.observe('password_hash_seconds', time.perf_counter() - started)
+
+        try:
+            return self._executor.submit(timed).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        """Hash a password with the configured parameters."""
+        return self._run(generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, password_hash, password):
+        """Check a password against a stored hash."""
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True when a stored hash was made with other parameters than the configured ones."""
+        return password_hash.split('$', 1)[0] != self.method
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,12 @@
+# Services package
+from .summary import ExpenseSummary, CategoryTotal, get_expense_summary, get_cached_expense_summary
+from .importer import ImportResult, ImportFileError, import_expenses
+from .exporter import EXPORT_FORMATS, export_expenses
+from .batch import BatchResult, BatchTooLarge, apply_expense_batch
+from .sync import SyncTokenExpired, get_sync_changes
+
+__all__ = ['ExpenseSummary', 'CategoryTotal', 'get_expense_summary', 'get_cached_expense_summary',
+           'ImportResult', 'ImportFileError', 'import_expenses',
+           'EXPORT_FORMATS', 'export_expenses',
+           'BatchResult', 'BatchTooLarge', 'apply_expense_batch',
+           'SyncTokenExpired', 'get_sync_changes']
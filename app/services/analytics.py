@@ -0,0 +1,195 @@
+from app import db
+from dataclasses import dataclass
+from datetime import date
+import numpy as np
+
+PERCENTILES = (50, 75, 90, 95, 99)
+MAX_WINDOW = 12
+
+# The series are computed over this many extra months before the range so
+# year-over-year deltas and rolling averages are defined from its first bucket
+BASELINE_MONTHS = 12
+
+@dataclass(frozen=True)
+class ExpenseColumns:
+    """One user's expenses as parallel arrays, ready for vectorised aggregation."""
+    days: np.ndarray        # datetime64[D]
+    categories: np.ndarray  # int64 category ids
+    amounts: np.ndarray     # float64
+
+    def __len__(self):
+        return len(self.amounts)
+
+def load_expense_columns(user_id, date_from, date_to):
+    """Fetch (date, category, amount) for the user's expenses in [date_from, date_to] in one query."""
+    from sqlalchemy import select
+    from app.models import Expense
+
+    statement = Expense.filter_user_expenses(
+        select(Expense.date, Expense.category_id, Expense.amount),
+        user_id, date_from=date_from, date_to=date_to
+    )
+    rows = db.session.execute(statement).all()
+
+    if not rows:
+        return ExpenseColumns(
+            np.empty(0, dtype='datetime64[D]'), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        )
+
+    days, categories, amounts = zip(*rows)
+    return ExpenseColumns(
+        np.array(days, dtype='datetime64[D]'),
+        np.array(categories, dtype=np.int64),
+        np.array(amounts, dtype=np.float64)
+    )
+
+def month_index(days):
+    """Months since 1970-01 for datetime64 values."""
+    return days.astype('datetime64[M]').astype(np.int64)
+
+def week_index(days):
+    """Monday-based weeks since the week of 1970-01-01 (a Thursday)."""
+    return (days.astype(np.int64) + 3) // 7
+
+def bucket(indexes, start, length, weights=None):
+    """Gap-filled per-bucket sums (or counts without weights) for buckets start..start+length-1."""
+    positions = indexes - start
+    keep = (positions >= 0) & (positions < length)
+    return np.bincount(
+        positions[keep],
+        weights=None if weights is None else weights[keep],
+        minlength=length
+    )[:length].astype(np.float64)
+
+def rolling_mean(values, window):
+    """Trailing mean over `window` buckets; NaN until the window is full."""
+    result = np.full(len(values), np.nan)
+    if window <= len(values):
+        cumulative = np.cumsum(np.insert(values, 0, 0.0))
+        result[window - 1:] = (cumulative[window:] - cumulative[:-window]) / window
+    return result
+
+def _to_list(values):
+    """Round to cents and turn NaN into None for JSON."""
+    return [None if np.isnan(value) else round(float(value), 2) for value in values]
+
+def _month_label(index):
+    return f'{1970 + index // 12:04d}-{index % 12 + 1:02d}'
+
+def day_of_month(days):
+    """Day of the month (1-31) for datetime64 values."""
+    return (days - days.astype('datetime64[M]')).astype(np.int64) + 1
+
+def get_expense_analytics(user_id, date_from, date_to, window=3):
+    """Gap-filled monthly/weekly/per-category series with rolling averages,
+    year-over-year deltas and amount percentiles for [date_from, date_to].
+
+    Buckets at the edges of the range only count days inside it. A partial
+    edge month is compared with the same days a year earlier, and partial
+    edge buckets get no rolling average; the averages themselves are taken
+    over whole months and weeks.
+    """
+    from app.models import Category
+
+    first_month = month_index(np.datetime64(date_from, 'D'))
+    last_month = month_index(np.datetime64(date_to, 'D'))
+    months = int(last_month - first_month + 1)
+
+    baseline_start = int(first_month) - BASELINE_MONTHS
+    baseline_from = date(1970 + baseline_start // 12, baseline_start % 12 + 1, 1)
+
+    columns = load_expense_columns(user_id, baseline_from, date_to)
+    in_range = columns.days >= np.datetime64(date_from, 'D')
+    amounts = columns.amounts[in_range]
+    month_of = month_index(columns.days)
+
+    starts_mid_month = date_from.day > 1
+    ends_mid_month = month_index(np.datetime64(date_to, 'D') + 1) == last_month
+
+    # Monthly: in-range totals, plus whole-month history for the baselines
+    totals = bucket(month_of[in_range], first_month, months, amounts)
+    counts = bucket(month_of[in_range], first_month, months)
+    history = bucket(month_of, baseline_start, months + BASELINE_MONTHS, columns.amounts)
+
+    # Year-over-year compares partial edge months with the same days a year earlier
+    day_of = day_of_month(columns.days)
+    comparable = np.ones(len(columns), dtype=bool)
+    if starts_mid_month:
+        comparable &= ~((month_of == first_month - 12) & (day_of < date_from.day))
+    if ends_mid_month:
+        comparable &= ~((month_of == last_month - 12) & (day_of > date_to.day))
+    previous_year = bucket(month_of[comparable], baseline_start, months, columns.amounts[comparable])
+    yoy_change = totals - previous_year
+    with np.errstate(divide='ignore', invalid='ignore'):
+        yoy_percent = np.where(previous_year > 0, yoy_change / previous_year * 100, np.nan)
+
+    monthly_rolling = rolling_mean(history, window)[BASELINE_MONTHS:]
+    if starts_mid_month:
+        monthly_rolling[0] = np.nan
+    if ends_mid_month:
+        monthly_rolling[-1] = np.nan
+
+    # Weekly, Monday to Sunday
+    first_week = int(week_index(np.datetime64(date_from, 'D')))
+    weeks = int(week_index(np.datetime64(date_to, 'D'))) - first_week + 1
+    week_of = week_index(columns.days)
+    weekly_totals = bucket(week_of[in_range], first_week, weeks, amounts)
+    weekly_counts = bucket(week_of[in_range], first_week, weeks)
+    weekly_history = bucket(week_of, first_week - window + 1, weeks + window - 1, columns.amounts)
+    weekly_rolling = rolling_mean(weekly_history, window)[window - 1:]
+    if date_from.weekday() != 0:
+        weekly_rolling[0] = np.nan
+    if date_to.weekday() != 6:
+        weekly_rolling[-1] = np.nan
+    week_starts = np.datetime64('1969-12-29') + np.arange(first_week, first_week + weeks) * 7
+
+    # Per category: one 2-D bincount over (category, month)
+    category_ids, category_pos = np.unique(columns.categories[in_range], return_inverse=True)
+    positions = category_pos * months + (month_of[in_range] - first_month)
+    category_series = np.bincount(
+        positions, weights=amounts, minlength=len(category_ids) * months
+    ).reshape(len(category_ids), months)
+    category_counts = np.bincount(category_pos, minlength=len(category_ids))
+
+    details = {
+        category.id: category.to_summary_dict()
+        for category in Category.query.filter(Category.id.in_(category_ids.tolist()))
+    } if len(category_ids) else {}
+
+    overall = float(amounts.sum())
+    categories = []
+    for pos in np.argsort(-category_series.sum(axis=1), kind='stable'):
+        total = float(category_series[pos].sum())
+        categories.append({
+            **details.get(int(category_ids[pos]), {'id': int(category_ids[pos])}),
+            'total': round(total, 2),
+            'count': int(category_counts[pos]),
+            'share': round(total / overall * 100, 1) if overall else 0,
+            'monthly': _to_list(category_series[pos])
+        })
+
+    percentiles = np.percentile(amounts, PERCENTILES) if len(amounts) else np.full(len(PERCENTILES), np.nan)
+
+    return {
+        'range': {'from': date_from.isoformat(), 'to': date_to.isoformat()},
+        'window': window,
+        'total_amount': round(overall, 2),
+        'total_expenses': int(len(amounts)),
+        'average_amount': round(overall / len(amounts), 2) if len(amounts) else None,
+        'percentiles': dict(zip((f'p{p}' for p in PERCENTILES), _to_list(percentiles))),
+        'monthly': {
+            'periods': [_month_label(index) for index in range(int(first_month), int(last_month) + 1)],
+            'totals': _to_list(totals),
+            'counts': [int(count) for count in counts],
+            'rolling_average': _to_list(monthly_rolling),
+            'yoy_change': _to_list(yoy_change),
+            'yoy_percent': _to_list(yoy_percent)
+        },
+        'weekly': {
+            'periods': [str(start) for start in week_starts],
+            'totals': _to_list(weekly_totals),
+            'counts': [int(count) for count in weekly_counts],
+            'rolling_average': _to_list(weekly_rolling)
+        },
+        'categories': categories
+    }
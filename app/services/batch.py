@@ -0,0 +1,189 @@
+from app import db, cache
+from app.services.importer import MAX_AMOUNT
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+class BatchTooLarge(ValueError):
+    """Raised when a batch holds more items than allowed."""
+
+@dataclass
+class BatchResult:
+    """Per-item outcome of one batch of creates and deletes."""
+    created: list = field(default_factory=list)
+    deleted: list = field(default_factory=list)
+    applied: bool = True
+
+    @property
+    def failed(self):
+        return sum(not item['success'] for item in self.created + self.deleted)
+
+    def to_dict(self):
+        return {
+            'created': self.created,
+            'deleted': self.deleted,
+            'failed': self.failed,
+            'applied': self.applied
+        }
+
+def _validate_create(item, today):
+    """Normalise one create item into insert values, or return an error message."""
+    if not isinstance(item, dict):
+        return None, 'Item must be an object'
+
+    try:
+        category_id = int(item.get('category_id'))
+    except (TypeError, ValueError):
+        return None, 'Invalid category'
+
+    try:
+        amount = Decimal(str(item.get('amount')))
+    except InvalidOperation:
+        return None, 'Invalid amount'
+
+    if not amount.is_finite() or amount <= 0 or amount >= MAX_AMOUNT:
+        return None, 'Amount must be greater than 0'
+
+    expense_date = today
+    if item.get('date'):
+        try:
+            expense_date = datetime.strptime(str(item['date']), '%Y-%m-%d').date()
+        except ValueError:
+            return None, 'Invalid date'
+
+    description = item.get('description') or ''
+    if not isinstance(description, str):
+        return None, 'Invalid description'
+
+    return {
+        'category_id': category_id,
+        'amount': amount.quantize(Decimal('0.01')),
+        'description': description.strip()[:255] or None,
+        'date': expense_date
+    }, None
+
+def apply_expense_batch(user_id, creates=(), deletes=(), atomic=False, max_items=500):
+    """Create and delete many expenses in one transaction.
+
+    Categories are validated with one IN query, rows are written with one
+    bulk INSERT and one DELETE, and rollups, category counters and the
+    user's data version are updated once for the whole batch. Invalid items
+    are reported per item; with atomic=True any invalid item cancels the
+    whole batch.
+    """
+    from sqlalchemy import insert, delete
+    from app.models import User, Category, Expense, ExpenseRollup, Tombstone
+
+    creates = list(creates or [])
+    deletes = list(deletes or [])
+    if len(creates) + len(deletes) > max_items:
+        raise BatchTooLarge(f'At most {max_items} items per batch')
+
+    result = BatchResult()
+    today = date.today()
+
+    # Validate creates, then check every referenced category with one query
+    pending = []
+    for index, item in enumerate(creates):
+        values, error = _validate_create(item, today)
+        entry = {'index': index, 'success': error is None}
+        if isinstance(item, dict) and 'client_id' in item:
+            entry['client_id'] = item['client_id']
+        if error:
+            entry['error'] = error
+        else:
+            pending.append((entry, values))
+        result.created.append(entry)
+
+    category_ids = {values['category_id'] for _, values in pending}
+    allowed = set()
+    if category_ids:
+        allowed = {
+            category_id for (category_id,) in db.session.query(Category.id).filter(
+                Category.id.in_(category_ids),
+                (Category.user_id == user_id) | (Category.user_id == None)
+            )
+        }
+
+    rows = []
+    for entry, values in pending:
+        if values['category_id'] in allowed:
+            rows.append((entry, {'user_id': user_id, **values}))
+        else:
+            entry.update(success=False, error='Invalid category')
+
+    # Resolve deletes with one query; only the user's own expenses qualify
+    delete_ids = []
+    for value in deletes:
+        try:
+            delete_ids.append((value, int(value)))
+        except (TypeError, ValueError):
+            delete_ids.append((value, None))
+
+    existing = {}
+    valid_ids = {expense_id for _, expense_id in delete_ids if expense_id is not None}
+    if valid_ids:
+        existing = {
+            row.id: row for row in db.session.query(
+                Expense.id, Expense.user_id, Expense.category_id, Expense.date, Expense.amount
+            ).filter(Expense.id.in_(valid_ids), Expense.user_id == user_id)
+        }
+
+    seen = set()
+    for value, expense_id in delete_ids:
+        if expense_id is None:
+            result.deleted.append({'id': value, 'success': False, 'error': 'Invalid id'})
+        elif expense_id in existing and expense_id not in seen:
+            result.deleted.append({'id': expense_id, 'success': True})
+            seen.add(expense_id)
+        else:
+            result.deleted.append({'id': expense_id, 'success': False,
+                                   'error': 'Duplicate id' if expense_id in seen else 'Expense not found'})
+
+    if atomic and result.failed:
+        for entry in result.created + result.deleted:
+            if entry['success']:
+                entry.update(success=False, error='Batch not applied')
+        result.applied = False
+        return result
+
+    if not (rows or seen):
+        result.applied = False
+        return result
+
+    try:
+        if rows:
+            ids = db.session.scalars(
+                insert(Expense).returning(Expense.id, sort_by_parameter_order=True),
+                [values for _, values in rows]
+            ).all()
+            for (entry, _), expense_id in zip(rows, ids):
+                entry['id'] = expense_id
+
+            created_rows = [
+                (user_id, values['category_id'], values['date'], values['amount']) for _, values in rows
+            ]
+            ExpenseRollup.record(created_rows)
+            Category.record_expenses(created_rows)
+
+        if seen:
+            db.session.execute(
+                delete(Expense).where(Expense.id.in_(seen), Expense.user_id == user_id),
+                execution_options={'synchronize_session': False}
+            )
+
+            deleted_rows = [
+                (row.user_id, row.category_id, row.date, row.amount) for row in existing.values()
+            ]
+            ExpenseRollup.record(deleted_rows, sign=-1)
+            Category.record_expenses(deleted_rows, sign=-1)
+            Tombstone.record(user_id, 'expense', sorted(seen))
+
+        User.bump_data_version(user_id)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    cache.invalidate(user_id)
+    return result
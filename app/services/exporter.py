@@ -0,0 +1,80 @@
+from app import db
+import csv
+import io
+import json
+
+EXPORT_COLUMNS = ('id', 'date', 'amount', 'description', 'category_id', 'category', 'created_at')
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+def iter_expense_rows(user_id, category_id=None, date_from=None, date_to=None, chunk_size=1000):
+    """Yield lists of export rows, fetched chunk_size at a time from a streaming cursor."""
+    from sqlalchemy import select
+    from app.models import Expense, Category
+
+    statement = Expense.filter_user_expenses(
+        select(
+            Expense.id,
+            Expense.date,
+            Expense.amount,
+            Expense.description,
+            Expense.category_id,
+            Category.name.label('category'),
+            Expense.created_at
+        ).outerjoin(Category, Category.id == Expense.category_id),
+        user_id, category_id, date_from, date_to
+    ).order_by(
+        Expense.date.desc(), Expense.created_at.desc(), Expense.id.desc()
+    ).execution_options(stream_results=True, yield_per=chunk_size)
+
+    result = db.session.execute(statement)
+    try:
+        for partition in result.partitions():
+            yield partition
+    finally:
+        result.close()
+
+def _serialize(row):
+    return {
+        'id': row.id,
+        'date': row.date.isoformat(),
+        'amount': float(row.amount),
+        'description': row.description,
+        'category_id': row.category_id,
+        'category': row.category,
+        'created_at': row.created_at.isoformat() if row.created_at else None
+    }
+
+def export_csv(chunks):
+    """Render row chunks as CSV text, one response chunk per row chunk."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+
+    for rows in chunks:
+        for row in rows:
+            values = _serialize(row)
+            writer.writerow([values[column] for column in EXPORT_COLUMNS])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def export_ndjson(chunks):
+    """Render row chunks as newline-delimited JSON, one response chunk per row chunk."""
+    for rows in chunks:
+        yield ''.join(json.dumps(_serialize(row)) + '\n' for row in rows)
+
+EXPORTERS = {
+    'csv': export_csv,
+    'ndjson': export_ndjson,
+}
+
+def export_expenses(user_id, file_format='csv', **filters):
+    """Stream a user's expenses in the given format with constant memory."""
+    return EXPORTERS[file_format](iter_expense_rows(user_id, **filters))
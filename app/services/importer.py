@@ -0,0 +1,267 @@
+from app import db, cache
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+import csv
+import re
+import time
+
+CSV_COLUMNS = {
+    'date': ('date', 'transaction date', 'posted date', 'posting date'),
+    'amount': ('amount', 'value'),
+    'debit': ('debit', 'withdrawal', 'withdrawals', 'paid out'),
+    'credit': ('credit', 'deposit', 'deposits', 'paid in'),
+    'type': ('type', 'transaction type'),
+    'description': ('description', 'payee', 'name', 'memo', 'details'),
+    'category': ('category', 'category_id'),
+}
+
+# Values of a CSV type column that mark money going out or coming in
+DEBIT_TYPES = {'debit', 'dr', 'withdrawal', 'payment', 'purchase'}
+CREDIT_TYPES = {'credit', 'cr', 'deposit', 'refund'}
+
+# Sign of money going out in a signed amount column. Bank exports (and OFX,
+# by specification) write spending as negative; this app's own CSV export
+# writes expenses as positive.
+EXPENSE_SIGNS = ('negative', 'positive')
+
+OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<\r\n]*)')
+
+MAX_REPORTED_ERRORS = 100
+
+# Expense.amount is Numeric(10, 2)
+MAX_AMOUNT = Decimal('100000000')
+
+class ImportFileError(ValueError):
+    """Raised for import files that cannot be read at all."""
+
+@dataclass
+class ImportResult:
+    """Outcome and throughput of one import run."""
+    imported: int = 0
+    skipped: int = 0
+    inflows: int = 0
+    batches: int = 0
+    elapsed: float = 0.0
+    errors: list = field(default_factory=list)
+
+    @property
+    def rows_per_second(self):
+        return round(self.imported / self.elapsed, 1) if self.elapsed else 0.0
+
+    def add_error(self, line, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'error': message})
+
+    def to_dict(self):
+        return {
+            'imported': self.imported,
+            'skipped': self.skipped,
+            'inflows_skipped': self.inflows,
+            'batches': self.batches,
+            'elapsed_seconds': round(self.elapsed, 3),
+            'rows_per_second': self.rows_per_second,
+            'errors': self.errors
+        }
+
+def parse_csv(stream):
+    """Yield (line, fields) pairs from a bank CSV export, one row at a time."""
+    reader = csv.DictReader(stream)
+    if not reader.fieldnames:
+        raise ImportFileError('CSV file has no header row')
+
+    headers = {name.strip().lower(): name for name in reader.fieldnames if name}
+    columns = {}
+    for key, aliases in CSV_COLUMNS.items():
+        columns[key] = next((headers[alias] for alias in aliases if alias in headers), None)
+
+    if not columns['date'] or not (columns['amount'] or columns['debit']):
+        raise ImportFileError('CSV file needs at least a date and an amount (or debit) column')
+
+    for row in reader:
+        yield reader.line_num, {
+            key: (row.get(column) or '').strip() if column else ''
+            for key, column in columns.items()
+        }
+
+def parse_ofx(stream):
+    """Yield (line, fields) pairs from the STMTTRN blocks of an OFX export.
+
+    Handles both SGML (unclosed tags) and XML flavours without loading the
+    whole document.
+    """
+    transaction = None
+    start_line = 0
+
+    for line_number, line in enumerate(stream, start=1):
+        for closing, tag, value in OFX_TAG.findall(line):
+            tag = tag.upper()
+
+            if tag == 'STMTTRN':
+                if closing:
+                    if transaction is not None:
+                        yield start_line, transaction
+                    transaction = None
+                else:
+                    transaction = {'date': '', 'amount': '', 'debit': '', 'credit': '', 'type': '',
+                                   'description': '', 'category': ''}
+                    start_line = line_number
+            elif transaction is not None and not closing:
+                value = value.strip()
+                if tag == 'DTPOSTED':
+                    transaction['date'] = value[:8]
+                elif tag == 'TRNAMT':
+                    transaction['amount'] = value
+                elif tag == 'NAME' or (tag == 'MEMO' and not transaction['description']):
+                    transaction['description'] = value
+
+PARSERS = {
+    'csv': (parse_csv, ('%Y-%m-%d', '%m/%d/%Y', '%d.%m.%Y')),
+    'ofx': (parse_ofx, ('%Y%m%d',)),
+}
+
+def parse_amount(value):
+    return Decimal(value.replace(',', '').replace('$', '').replace(' ', ''))
+
+def expense_amount(fields, expense_sign='negative'):
+    """Return the amount spent in a row, or None when the row is money coming in.
+
+    Separate debit and credit columns decide first, then a debit/credit
+    type column, then the sign of the amount column. Raises
+    InvalidOperation for unreadable amounts.
+    """
+    kind = fields.get('type', '').strip().lower()
+
+    if fields.get('debit') or fields.get('credit'):
+        if not fields.get('debit'):
+            return None
+        return abs(parse_amount(fields['debit']))
+
+    amount = parse_amount(fields['amount'])
+    if kind in DEBIT_TYPES:
+        return abs(amount)
+    if kind in CREDIT_TYPES:
+        return None
+
+    if (amount < 0) != (expense_sign == 'negative'):
+        return None
+    return abs(amount)
+
+def load_category_map(user_id):
+    """Preload the categories a user may file expenses under, by id and name."""
+    from app.models import Category
+
+    categories = Category.get_user_categories(user_id)
+    by_id = {str(category.id): category.id for category in categories}
+    by_name = {}
+    # Personal categories shadow global ones with the same name
+    for category in sorted(categories, key=lambda c: c.user_id is not None):
+        by_name[category.name.strip().lower()] = category.id
+    return by_id, by_name
+
+def import_expenses(user_id, stream, file_format='csv', batch_size=1000, default_category=None,
+                    expense_sign='negative'):
+    """Stream-parse a bank export and bulk insert its rows as expenses.
+
+    Rows are validated against a preloaded category map, inserted with one
+    executemany per batch and committed every ``batch_size`` rows along
+    with their rollup updates. Invalid rows are skipped and reported;
+    inflows (credits, refunds) are skipped and counted. ``expense_sign``
+    says which sign marks spending in a CSV amount column; OFX amounts are
+    always negative for spending.
+    """
+    from app.models import User, Category, Expense, ExpenseRollup
+
+    if file_format not in PARSERS:
+        raise ImportFileError(f'Unsupported import format: {file_format}')
+
+    if expense_sign not in EXPENSE_SIGNS:
+        raise ImportFileError(f'expense_sign must be one of: {", ".join(EXPENSE_SIGNS)}')
+
+    if file_format == 'ofx':
+        expense_sign = 'negative'
+
+    parse, date_formats = PARSERS[file_format]
+    by_id, by_name = load_category_map(user_id)
+
+    default_category_id = None
+    if default_category:
+        default_category_id = by_id.get(str(default_category)) or by_name.get(str(default_category).strip().lower())
+        if not default_category_id:
+            raise ImportFileError(f'Unknown default category: {default_category}')
+
+    result = ImportResult()
+    started = time.perf_counter()
+    batch = []
+    insert = Expense.__table__.insert()
+
+    def flush():
+        db.session.execute(insert, batch)
+        rows = [
+            (values['user_id'], values['category_id'], values['date'], values['amount'])
+            for values in batch
+        ]
+        ExpenseRollup.record(rows)
+        Category.record_expenses(rows)
+        User.bump_data_version(user_id)
+        db.session.commit()
+        cache.invalidate(user_id)
+        result.imported += len(batch)
+        result.batches += 1
+        batch.clear()
+
+    try:
+        for line, fields in parse(stream):
+            expense_date = None
+            for date_format in date_formats:
+                try:
+                    expense_date = datetime.strptime(fields['date'], date_format).date()
+                    break
+                except ValueError:
+                    continue
+
+            if not expense_date:
+                result.add_error(line, f"Invalid date: {fields['date']!r}")
+                continue
+
+            try:
+                amount = expense_amount(fields, expense_sign)
+            except InvalidOperation:
+                result.add_error(line, f"Invalid amount: {fields['amount'] or fields['debit']!r}")
+                continue
+
+            if amount is None:
+                result.inflows += 1
+                continue
+
+            if not amount.is_finite() or amount == 0 or amount >= MAX_AMOUNT:
+                result.add_error(line, f"Amount out of range: {fields['amount']!r}")
+                continue
+
+            category = fields['category']
+            category_id = by_id.get(category) or by_name.get(category.lower()) or default_category_id
+            if not category_id:
+                result.add_error(line, f'Unknown category: {category!r}' if category else 'Missing category')
+                continue
+
+            batch.append({
+                'user_id': user_id,
+                'category_id': category_id,
+                'amount': amount.quantize(Decimal('0.01')),
+                'description': fields['description'][:255] or None,
+                'date': expense_date
+            })
+
+            if len(batch) >= batch_size:
+                flush()
+
+        if batch:
+            flush()
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        result.elapsed = time.perf_counter() - started
+
+    return result
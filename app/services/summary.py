@@ -0,0 +1,119 @@
+from app import db
+from dataclasses import dataclass, field
+from datetime import datetime
+import calendar
+
+@dataclass(frozen=True)
+class CategoryTotal:
+    """Spending for one category in the summary period."""
+    id: int
+    name: str
+    icon: str
+    color: str
+    total: float
+
+@dataclass(frozen=True)
+class ExpenseSummary:
+    """Dashboard figures for one user and month."""
+    user_id: int
+    year: int
+    month: int
+    monthly_total: float = 0.0
+    total_expenses: int = 0
+    total_amount: float = 0.0
+    categories: tuple = field(default_factory=tuple)
+
+    @property
+    def month_name(self):
+        return calendar.month_name[self.month]
+
+    def to_dict(self):
+        """Convert summary to the /api/expense-summary payload."""
+        categories = []
+        for cat in self.categories:
+            if cat.total > 0:  # Only include categories with expenses
+                percentage = (cat.total / self.monthly_total * 100) if self.monthly_total > 0 else 0
+                categories.append({
+                    'id': cat.id,
+                    'name': cat.name,
+                    'icon': cat.icon,
+                    'color': cat.color,
+                    'total': cat.total,
+                    'percentage': round(percentage, 1)
+                })
+
+        return {
+            'monthly_total': self.monthly_total,
+            'total_expenses': self.total_expenses,
+            'total_amount': self.total_amount,
+            'categories': categories,
+            'month': self.month_name,
+            'year': self.year
+        }
+
+def get_expense_summary(user_id, year=None, month=None):
+    """Compute the monthly, all-time and per-category figures in one query.
+
+    Returns None when the user no longer exists.
+    """
+    from sqlalchemy import func, case, exists
+    from app.models import User, Category, ExpenseRollup
+
+    now = datetime.now()
+    year = year or now.year
+    month = month or now.month
+
+    in_month = (ExpenseRollup.year == year) & (ExpenseRollup.month == month)
+    monthly_total = func.coalesce(func.sum(case((in_month, ExpenseRollup.total), else_=0)), 0)
+
+    rows = db.session.query(
+        Category.id,
+        Category.name,
+        Category.icon,
+        Category.color,
+        monthly_total.label('monthly_total'),
+        func.coalesce(func.sum(ExpenseRollup.total), 0).label('total_amount'),
+        func.coalesce(func.sum(ExpenseRollup.count), 0).label('total_expenses'),
+        exists().where(User.id == user_id).label('user_exists')
+    ).outerjoin(
+        ExpenseRollup, (Category.id == ExpenseRollup.category_id) & (ExpenseRollup.user_id == user_id)
+    ).filter(
+        (Category.user_id == user_id) | (Category.user_id == None)
+    ).group_by(
+        Category.id, Category.name, Category.icon, Category.color
+    ).order_by(
+        monthly_total.desc(), Category.name
+    ).all()
+
+    if not rows:
+        # No categories at all, so fall back to a plain existence check
+        return ExpenseSummary(user_id, year, month) if User.query.get(user_id) else None
+
+    if not rows[0].user_exists:
+        return None
+
+    categories = tuple(
+        CategoryTotal(row.id, row.name, row.icon, row.color, float(row.monthly_total))
+        for row in rows
+    )
+
+    return ExpenseSummary(
+        user_id=user_id,
+        year=year,
+        month=month,
+        monthly_total=round(sum(cat.total for cat in categories), 2),
+        total_expenses=sum(int(row.total_expenses) for row in rows),
+        total_amount=round(sum(float(row.total_amount) for row in rows), 2),
+        categories=categories
+    )
+
+def get_cached_expense_summary(user_id):
+    """Current month's summary, served from the per-user cache when fresh."""
+    from app import cache
+
+    now = datetime.now()
+    return cache.get_or_set(
+        user_id,
+        f'summary:{now:%Y-%m}',
+        lambda: get_expense_summary(user_id, now.year, now.month)
+    )
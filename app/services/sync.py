@@ -0,0 +1,109 @@
+from app.pagination import InvalidCursor, encode_cursor, decode_cursor
+from datetime import datetime, timedelta
+
+# Sorts before any real updated_at, so a first sync starts from the beginning
+EPOCH = datetime(1970, 1, 1)
+
+class SyncTokenExpired(ValueError):
+    """Raised when a sync token is older than the tombstone retention window."""
+
+def encode_sync_token(expense_at, expense_id, tombstone_id, category_at, issued_at):
+    """Pack the per-table high-water marks into an opaque change token."""
+    return encode_cursor('next', [
+        expense_at.isoformat(), expense_id, tombstone_id, category_at.isoformat(), issued_at.isoformat()
+    ])
+
+def decode_sync_token(token):
+    """Unpack a change token into (expense_at, expense_id, tombstone_id, category_at, issued_at)."""
+    _, values = decode_cursor(token)
+    try:
+        return (
+            datetime.fromisoformat(values[0]),
+            int(values[1]),
+            int(values[2]),
+            datetime.fromisoformat(values[3]),
+            datetime.fromisoformat(values[4])
+        )
+    except (ValueError, TypeError, IndexError):
+        raise InvalidCursor('Malformed sync token')
+
+def get_sync_changes(user_id, token=None, limit=500, retention_days=90, safety_seconds=60):
+    """Get the expenses, categories and deletes that changed since a token.
+
+    Without a token everything is returned (a full sync). Expenses are read
+    in (updated_at, id) order and deletes in tombstone id order, at most
+    limit of each per call; while has_more is true the client calls again
+    with the returned token. Tokens older than retention_days raise
+    SyncTokenExpired, since the tombstones they need may have been pruned.
+
+    Rows are stamped before their transaction commits, so a write stamped
+    earlier can become visible after a later one. The token that ends a
+    sync therefore never moves past the last safety_seconds; the next sync
+    sends those changes again, and clients apply them by id.
+    """
+    from sqlalchemy import tuple_, literal
+    from app.models import Category, Expense, Tombstone
+
+    now = datetime.utcnow()
+
+    if token:
+        expense_at, expense_id, tombstone_id, category_at, issued_at = decode_sync_token(token)
+        if issued_at < now - timedelta(days=retention_days):
+            raise SyncTokenExpired('Sync token expired; start a full sync')
+    else:
+        expense_at, expense_id, category_at = EPOCH, 0, EPOCH
+        # A full sync has nothing to delete, so skip straight past old tombstones
+        tombstone_id = Tombstone.get_last_id(user_id)
+
+    expenses = Expense.query.filter(
+        Expense.user_id == user_id,
+        tuple_(Expense.updated_at, Expense.id) > tuple_(
+            literal(expense_at, Expense.updated_at.type), literal(expense_id, Expense.id.type)
+        )
+    ).order_by(Expense.updated_at, Expense.id).limit(limit + 1).all()
+
+    tombstones = Tombstone.get_since(user_id, tombstone_id, limit + 1)
+    has_more = len(expenses) > limit or len(tombstones) > limit
+    expenses = expenses[:limit]
+    tombstones = tombstones[:limit]
+
+    # Categories are few per user, so every changed one is returned each call.
+    # Counter updates leave updated_at alone, so only real edits show up here.
+    categories = Category.query.filter(
+        (Category.user_id == user_id) | (Category.user_id == None),
+        Category.updated_at > category_at
+    ).order_by(Category.updated_at, Category.id).all()
+
+    if expenses:
+        expense_at, expense_id = expenses[-1].updated_at, expenses[-1].id
+    if tombstones:
+        tombstone_id = tombstones[-1].id
+    if categories:
+        category_at = categories[-1].updated_at
+
+    if not has_more:
+        # Pages in between advance freely so a burst of recent writes cannot
+        # make the client loop; only the final token is held back
+        settled = now - timedelta(seconds=safety_seconds)
+        if (expense_at, expense_id) > (settled, 0):
+            expense_at, expense_id = settled, 0
+        category_at = min(category_at, settled)
+        unsettled_id = Tombstone.get_first_id_since(user_id, settled)
+        if unsettled_id is not None:
+            tombstone_id = min(tombstone_id, unsettled_id - 1)
+
+    deleted = {'expenses': [], 'categories': []}
+    for tombstone in tombstones:
+        deleted.setdefault(tombstone.entity + 's', []).append(tombstone.entity_id)
+
+    return {
+        'expenses': [expense.to_sync_dict() for expense in expenses],
+        'categories': [
+            {**category.to_summary_dict(), 'user_id': category.user_id,
+             'updated_at': category.updated_at.isoformat()}
+            for category in categories
+        ],
+        'deleted': deleted,
+        'has_more': has_more,
+        'token': encode_sync_token(expense_at, expense_id, tombstone_id, category_at, now)
+    }
@@ -0,0 +1,314 @@
+import os
+import pickle
+import re
+import secrets
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+SID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{32,64}$')
+
+# How often a store drops expired sessions on its own while writing
+SESSION_SWEEP_SECONDS = 3600
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """The user fields pages need, captured at login and kept in the session."""
+    id: int
+    username: str
+    email: str
+    created_at: datetime
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.username, user.email, user.created_at)
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """Session whose data lives in a SessionStore; the cookie holds only its id."""
+
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.previous_sid = None
+
+    def rotate(self):
+        """Move the data to a fresh id, e.g. at login to prevent session fixation."""
+        if self.previous_sid is None and not self.new:
+            self.previous_sid = self.sid
+        self.sid = secrets.token_urlsafe(32)
+        self.modified = True
+
+class MemorySessionStore:
+    """Per-process session store; sessions are lost on restart."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def get(self, sid):
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is None:
+                return None
+
+            data, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[sid]
+                return None
+
+            return dict(data)
+
+    def set(self, sid, data, ttl):
+        with self._lock:
+            self._entries[sid] = (dict(data), time.time() + ttl)
+
+        if time.monotonic() - self._last_sweep >= SESSION_SWEEP_SECONDS:
+            self.prune_expired()
+
+    def delete(self, sid):
+        with self._lock:
+            self._entries.pop(sid, None)
+
+    def prune_expired(self):
+        """Drop sessions past their expiry and return how many were dropped."""
+        now = time.time()
+        with self._lock:
+            self._last_sweep = time.monotonic()
+            sids = [sid for sid, (_, expires_at) in self._entries.items() if expires_at <= now]
+            for sid in sids:
+                del self._entries[sid]
+        return len(sids)
+
+    def revoke_user(self, user_id):
+        with self._lock:
+            sids = [sid for sid, (data, _) in self._entries.items() if data.get('user_id') == user_id]
+            for sid in sids:
+                del self._entries[sid]
+        return len(sids)
+
+class FileSystemSessionStore:
+    """One pickle file per session in a directory shared by all workers on a host.
+
+    Each file's mtime is set to its expiry, so sweeps need only stat() it.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._sweep_lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def _path(self, sid):
+        return os.path.join(self.directory, f'{sid}.session')
+
+    def _read(self, path):
+        try:
+            with open(path, 'rb') as handle:
+                return pickle.load(handle)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def get(self, sid):
+        path = self._path(sid)
+        entry = self._read(path)
+        if entry is None:
+            return None
+
+        data, expires_at = entry
+        if expires_at <= time.time():
+            self.delete(sid)
+            return None
+
+        return data
+
+    def set(self, sid, data, ttl):
+        expires_at = time.time() + ttl
+
+        # Write then rename so concurrent readers never see a partial file
+        handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(handle, 'wb') as temp_file:
+            pickle.dump((dict(data), expires_at), temp_file)
+        os.utime(temp_path, (expires_at, expires_at))
+        os.replace(temp_path, self._path(sid))
+
+        if time.monotonic() - self._last_sweep >= SESSION_SWEEP_SECONDS:
+            # One sweeping thread per process is plenty; the others carry on
+            if self._sweep_lock.acquire(blocking=False):
+                try:
+                    self.prune_expired()
+                finally:
+                    self._sweep_lock.release()
+
+    def delete(self, sid):
+        try:
+            os.remove(self._path(sid))
+        except FileNotFoundError:
+            pass
+
+    def prune_expired(self):
+        """Delete expired session files and return how many were deleted.
+
+        Files written before expiries were stamped on the mtime are read to
+        confirm. Temp files a crashed write left behind go after an hour.
+        """
+        self._last_sweep = time.monotonic()
+        now = time.time()
+        removed = 0
+
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.name.endswith('.tmp'):
+                    if entry.stat().st_mtime < now - SESSION_SWEEP_SECONDS:
+                        os.remove(entry.path)
+                    continue
+                if not entry.name.endswith('.session') or entry.stat().st_mtime > now:
+                    continue
+
+                stored = self._read(entry.path)
+                if stored is None or stored[1] <= now:
+                    os.remove(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                # Another worker deleted or replaced it first
+                continue
+
+        return removed
+
+    def revoke_user(self, user_id):
+        revoked = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith('.session'):
+                continue
+            entry = self._read(os.path.join(self.directory, name))
+            if entry is not None and entry[0].get('user_id') == user_id:
+                self.delete(name[:-len('.session')])
+                revoked += 1
+        return revoked
+
+class RedisSessionStore:
+    """Session store for Redis or any server speaking its protocol."""
+
+    def __init__(self, url=None, client=None, prefix='session:'):
+        self.prefix = prefix
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("SESSION_BACKEND='redis' requires the 'redis' package")
+            client = redis.Redis.from_url(url)
+        self.client = client
+
+    def get(self, sid):
+        value = self.client.get(f'{self.prefix}{sid}')
+        return pickle.loads(value) if value is not None else None
+
+    def set(self, sid, data, ttl):
+        ttl = max(1, int(ttl))
+        pipeline = self.client.pipeline()
+        pipeline.set(f'{self.prefix}{sid}', pickle.dumps(dict(data)), ex=ttl)
+        if data.get('user_id') is not None:
+            # Index by user so all of a user's sessions can be revoked together
+            index = f"{self.prefix}user:{data['user_id']}"
+            pipeline.sadd(index, sid)
+            pipeline.expire(index, ttl)
+        pipeline.execute()
+
+    def delete(self, sid):
+        self.client.delete(f'{self.prefix}{sid}')
+
+    def prune_expired(self):
+        """Nothing to do: Redis expires sessions itself."""
+        return 0
+
+    def revoke_user(self, user_id):
+        index = f'{self.prefix}user:{user_id}'
+        sids = [sid.decode() if isinstance(sid, bytes) else sid for sid in self.client.smembers(index)]
+        if sids:
+            self.client.delete(*[f'{self.prefix}{sid}' for sid in sids])
+        self.client.delete(index)
+        return len(sids)
+
+class ServerSideSessionInterface(SessionInterface):
+    """Keep session data in a server-side store so it can hold the user snapshot
+    and be revoked; the cookie carries only a random session id."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid and SID_PATTERN.match(sid):
+            data = self.store.get(sid)
+            if data is not None:
+                return ServerSideSession(data, sid=sid)
+        return ServerSideSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.previous_sid:
+            self.store.delete(session.previous_sid)
+
+        if not session:
+            if session.modified:
+                if not session.new:
+                    self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path,
+                                       secure=self.get_cookie_secure(app),
+                                       httponly=self.get_cookie_httponly(app),
+                                       samesite=self.get_cookie_samesite(app))
+            return
+
+        if not session.modified and not self.should_set_cookie(app, session):
+            return
+
+        ttl = app.permanent_session_lifetime.total_seconds()
+        self.store.set(session.sid, session, ttl)
+        response.set_cookie(name, session.sid,
+                            expires=self.get_expiration_time(app, session),
+                            domain=domain, path=path,
+                            secure=self.get_cookie_secure(app),
+                            httponly=self.get_cookie_httponly(app),
+                            samesite=self.get_cookie_samesite(app))
+
+def init_sessions(app):
+    """Install the server-side session interface selected by SESSION_BACKEND."""
+    backend = app.config.get('SESSION_BACKEND', 'memory')
+
+    if backend == 'memory':
+        store = MemorySessionStore()
+    elif backend == 'filesystem':
+        store = FileSystemSessionStore(
+            app.config.get('SESSION_FILE_DIR') or os.path.join(app.instance_path, 'sessions')
+        )
+    elif backend == 'redis':
+        store = RedisSessionStore(app.config.get('SESSION_REDIS_URL'), prefix=app.config.get('SESSION_KEY_PREFIX', 'session:'))
+    else:
+        raise ValueError(f'Unknown SESSION_BACKEND: {backend}')
+
+    app.session_interface = ServerSideSessionInterface(store)
+    app.extensions['session_store'] = store
+
+def check_worker_sessions(backend, workers):
+    """Refuse per-process memory sessions when several worker processes serve the app.
+
+    Each worker would only know the logins it handled itself, so most
+    requests would bounce to the login page.
+    """
+    if backend == 'memory' and workers > 1:
+        raise RuntimeError(
+            f'SESSION_BACKEND=memory cannot be shared by {workers} worker processes; '
+            'set SESSION_BACKEND=filesystem or redis, or run a single worker'
+        )
@@ -0,0 +1,38 @@
+from datetime import date, datetime
+
+def period_range(year=None, month=None):
+    """Turn a year and optional month into a half-open [start, end) date range.
+
+    A month without a year refers to the current year. Returns None when
+    neither is given.
+    """
+    if not year and not month:
+        return None
+
+    if not year:
+        year = datetime.now().year
+
+    if not month:
+        return date(year, 1, 1), date(year + 1, 1, 1)
+
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+def period_filter(column, year=None, month=None):
+    """Build sargable range predicates on a date column for a year/month period."""
+    bounds = period_range(year, month)
+    if bounds is None:
+        return []
+
+    start, end = bounds
+    return [column >= start, column < end]
+
+def parse_date(value):
+    """Parse a YYYY-MM-DD string, returning None for empty values.
+
+    Raises ValueError for malformed dates.
+    """
+    if not value:
+        return None
+    return datetime.strptime(value, '%Y-%m-%d').date()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Sequential vs concurrent aggregate queries behind /api/dashboard.
+
+Drives /api/dashboard from several poller threads against a seeded SQLite
+database, once with API_CONCURRENT_QUERIES off (summary, chart and recent
+expenses queried one after another) and once with it on (the three run
+concurrently on separate connections), and reports latency and throughput
+for each mode.
+
+    python -m benchmarks.async_api --pollers 8 --requests 50 --output async.json
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks.common import run_metadata, summarize_ms, write_result
+from benchmarks.datagen import generate, username_for
+from benchmarks.routes import build_app, login
+
+MODES = {'sequential': False, 'concurrent': True}
+
+def poll(app, username, requests, durations, errors):
+    client = app.test_client()
+    login(client, username)
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = client.get('/api/dashboard')
+        durations.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            errors.append(response.status_code)
+
+def run_mode(app, users, pollers, requests):
+    durations = []
+    errors = []
+    threads = [
+        threading.Thread(target=poll, args=(app, username_for(index % users), requests, durations, errors))
+        for index in range(pollers)
+    ]
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        'requests': len(durations),
+        'errors': len(errors),
+        'requests_per_second': round(len(durations) / elapsed, 1),
+        **summarize_ms(durations),
+    }
+
+def run(database, users, expenses, years, seed, pollers, requests):
+    # The null cache makes every request reach the database
+    app = build_app(database, 'null')
+
+    with app.app_context():
+        from app import db
+        from app.models import User
+
+        db.create_all()
+        dataset = None
+        if not User.query.filter_by(username=username_for(0)).first():
+            dataset = generate(users, expenses, years, seed)
+        db.session.remove()
+
+    results = {}
+    for mode, concurrent in MODES.items():
+        app.config['API_CONCURRENT_QUERIES'] = concurrent
+        run_mode(app, users, 1, 3)  # warm up connections and statement caches
+        results[mode] = run_mode(app, users, pollers, requests)
+
+    return {
+        'benchmark': 'async_api',
+        'meta': run_metadata(),
+        'params': {
+            'users': users, 'expenses_per_user': expenses, 'years': years, 'seed': seed,
+            'pollers': pollers, 'requests_per_poller': requests,
+        },
+        'dataset': dataset,
+        'scenarios': results,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database', help='SQLite file to use; generated if missing (default: temp file)')
+    parser.add_argument('--users', type=int, default=2)
+    parser.add_argument('--expenses', type=int, default=5000, help='Expenses per user')
+    parser.add_argument('--years', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--pollers', type=int, default=8, help='Concurrent poller threads')
+    parser.add_argument('--requests', type=int, default=30, help='Requests per poller and mode')
+    parser.add_argument('--output', help='Write the JSON result to this file')
+    args = parser.parse_args()
+
+    database = args.database
+    cleanup = False
+    if not database:
+        handle, database = tempfile.mkstemp(suffix='.db', prefix='bench-')
+        os.close(handle)
+        os.remove(database)
+        cleanup = True
+
+    try:
+        result = run(database, args.users, args.expenses, args.years, args.seed,
+                     args.pollers, args.requests)
+    finally:
+        if cleanup:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(database + suffix):
+                    os.remove(database + suffix)
+
+    write_result(result, args.output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Category totals latency as a user's expense history grows.
+
+For each history size, seeds a fresh SQLite database for one user at a fixed
+number of expenses per month (so more history means more years, while the
+period being queried stays the same size) and times:
+
+- month: Expense.get_category_totals for the current month (rollups)
+- range: Expense.get_category_totals for the last 30 days (covering index)
+- legacy_extract: the old shape, an outer join filtered with extract() in
+  the WHERE clause, kept for comparison
+
+Both current paths should stay flat as the history grows; the legacy query
+grows with it.
+
+    python -m benchmarks.category_totals --sizes 1000,10000,100000 --output totals.json
+"""
+
+import argparse
+import math
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+from benchmarks.common import run_metadata, summarize_ms, write_result
+from benchmarks.datagen import generate, username_for
+
+def legacy_category_totals(user_id, year, month):
+    """The pre-rollup query: period filter in WHERE via extract(), over raw expenses."""
+    from sqlalchemy import func, extract
+    from app import db
+    from app.models import Category, Expense
+
+    return db.session.query(
+        Category.id, Category.name, func.sum(Expense.amount).label('total')
+    ).outerjoin(
+        Expense, (Category.id == Expense.category_id) & (Expense.user_id == user_id)
+    ).filter(
+        (Category.user_id == user_id) | (Category.user_id == None)
+    ).filter(
+        (Expense.date == None) | ((extract('year', Expense.date) == year) & (extract('month', Expense.date) == month))
+    ).group_by(Category.id, Category.name).order_by(func.sum(Expense.amount).desc()).all()
+
+def time_calls(call, repeats):
+    durations = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        call()
+        durations.append(time.perf_counter() - started)
+    return durations
+
+def run_size(size, per_month, seed, repeats):
+    from app import create_app
+
+    handle, database = tempfile.mkstemp(suffix='.db', prefix='bench-')
+    os.close(handle)
+    os.remove(database)
+
+    try:
+        app = create_app('production', {
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database}',
+            'PERFORMANCE_LOG_LEVEL': 'WARNING',
+        })
+        with app.app_context():
+            from app.models import Expense, User
+
+            years = max(1, math.ceil(size / (per_month * 12)))
+            generate(users=1, expenses=size, years=years, seed=seed)
+            user_id = User.query.filter_by(username=username_for(0)).first().id
+
+            today = date.today()
+            scenarios = {
+                'month': lambda: Expense.get_category_totals(user_id, today.year, today.month),
+                'range': lambda: Expense.get_category_totals(
+                    user_id, date_from=today - timedelta(days=30), date_to=today
+                ),
+                'legacy_extract': lambda: legacy_category_totals(user_id, today.year, today.month),
+            }
+
+            results = {}
+            for name, call in scenarios.items():
+                call()  # warm the page cache
+                results[f'{name}.expenses_{size}'] = {
+                    'expenses': size,
+                    'years': years,
+                    **summarize_ms(time_calls(call, repeats)),
+                }
+            return results
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(database + suffix):
+                os.remove(database + suffix)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,10000,50000', help='Comma-separated history sizes')
+    parser.add_argument('--per-month', type=int, default=100, help='Expenses per month of history')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeats', type=int, default=50, help='Timed calls per scenario')
+    parser.add_argument('--output', help='Write the JSON result to this file')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    result = {
+        'benchmark': 'category_totals',
+        'meta': run_metadata(),
+        'params': {'sizes': sizes, 'per_month': args.per_month, 'seed': args.seed, 'repeats': args.repeats},
+        'scenarios': {},
+    }
+    for size in sizes:
+        result['scenarios'].update(run_size(size, args.per_month, args.seed, args.repeats))
+
+    write_result(result, args.output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Shared helpers for the benchmark scripts."""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from contextlib import contextmanager
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty sequence."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def summarize_ms(seconds):
+    """p50/p95/p99/mean of a list of durations in seconds, in milliseconds."""
+    return {
+        'p50_ms': round(percentile(seconds, 50) * 1000, 3),
+        'p95_ms': round(percentile(seconds, 95) * 1000, 3),
+        'p99_ms': round(percentile(seconds, 99) * 1000, 3),
+        'mean_ms': round(statistics.mean(seconds) * 1000, 3),
+    }
+
+class QueryCounter:
+    """Counts SQL statements executed on an engine."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    @contextmanager
+    def measure(self):
+        """Yield a dict that holds 'queries' and 'seconds' once the block exits."""
+        sample = {}
+        before = self.count
+        started = time.perf_counter()
+        try:
+            yield sample
+        finally:
+            sample['seconds'] = time.perf_counter() - started
+            sample['queries'] = self.count - before
+
+def run_metadata():
+    """Describe the code and machine a result came from."""
+    try:
+        revision = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        revision = None
+
+    return {
+        'git_revision': revision,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+    }
+
+def write_result(result, path=None):
+    """Print a result as JSON and optionally save it for later comparison."""
+    text = json.dumps(result, indent=2)
+    print(text)
+    if path:
+        with open(path, 'w') as f:
+            f.write(text + '\n')
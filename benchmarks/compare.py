@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Compare two benchmark result files scenario by scenario.
+
+    python -m benchmarks.compare baseline.json candidate.json
+"""
+
+import argparse
+import json
+
+METRICS = ('p50_ms', 'p95_ms', 'p99_ms', 'queries_mean')
+
+def load_scenarios(path):
+    with open(path) as f:
+        result = json.load(f)
+    return result.get('scenarios') or {result.get('benchmark', 'result'): result.get('total', result)}
+
+def change(old, new):
+    if not old:
+        return '    n/a'
+    return f'{(new - old) / old * 100:+7.1f}%'
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    args = parser.parse_args()
+
+    baseline = load_scenarios(args.baseline)
+    candidate = load_scenarios(args.candidate)
+
+    print(f"{'scenario':<28} {'metric':<13} {'baseline':>10} {'candidate':>10} {'change':>8}")
+    for name in sorted(set(baseline) | set(candidate)):
+        old, new = baseline.get(name, {}), candidate.get(name, {})
+        for metric in METRICS:
+            if metric in old or metric in new:
+                before, after = old.get(metric), new.get(metric)
+                delta = change(before, after) if before is not None and after is not None else '    n/a'
+                print(f"{name:<28} {metric:<13} {before if before is not None else '-':>10} "
+                      f"{after if after is not None else '-':>10} {delta:>8}")
+
+if __name__ == '__main__':
+    main()
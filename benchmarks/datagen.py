@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Seeded synthetic data generator for benchmarks.
+
+Creates N users, each with M expenses spread evenly over the last Y years
+across their categories, through the real models so rollups and counters
+match what the app itself would have written.
+
+    python -m benchmarks.datagen --database /tmp/bench.db --users 5 --expenses 20000 --years 3
+"""
+
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+PASSWORD = 'benchmark-password'
+
+MERCHANTS = [
+    'Corner Cafe', 'City Transit', 'Green Grocer', 'Cinema Palace', 'Power & Light Co',
+    'Main St Pharmacy', 'Book Nook', 'Fuel Stop', 'Pizza Place', 'Online Marketplace',
+    'Gym Membership', 'Streaming Service', 'Hardware Store', 'Taxi Ride', 'Bakery',
+]
+
+def username_for(index):
+    return f'bench{index:04d}'
+
+def generate(users=5, expenses=10000, years=2, seed=42, batch_size=5000):
+    """Populate the current app's database. Must run inside an app context."""
+    from app import db
+    from app.models import User, Category, Expense, ExpenseRollup
+
+    rng = random.Random(seed)
+    today = date.today()
+    span_days = max(1, years * 365)
+    started = time.perf_counter()
+
+    db.create_all()
+    Category.seed_defaults()
+    db.session.commit()
+
+    # Hash once and reuse; password hashing is not what this data is for
+    password_hash = User('hash', 'hash@example.com', PASSWORD).password_hash
+    insert = Expense.__table__.insert()
+
+    for index in range(users):
+        user = User(username_for(index), f'{username_for(index)}@example.com', 'x')
+        user.password_hash = password_hash
+        db.session.add(user)
+        db.session.flush()
+        Category.create_user_categories(user.id)
+        db.session.flush()
+
+        category_ids = [category.id for category in Category.query.filter_by(user_id=user.id)]
+        # Skewed category usage, like real spending
+        weights = [rng.uniform(0.2, 3.0) for _ in category_ids]
+
+        remaining = expenses
+        while remaining:
+            count = min(batch_size, remaining)
+            rows = []
+            for _ in range(count):
+                rows.append({
+                    'user_id': user.id,
+                    'category_id': rng.choices(category_ids, weights)[0],
+                    'amount': round(rng.lognormvariate(3, 1), 2) + 0.01,
+                    'description': f'{rng.choice(MERCHANTS)} #{rng.randint(1, 999)}',
+                    'date': today - timedelta(days=rng.randrange(span_days))
+                })
+            db.session.execute(insert, rows)
+            remaining -= count
+
+        db.session.commit()
+
+    ExpenseRollup.rebuild()
+    Category.reconcile_counters()
+    db.session.commit()
+
+    return {
+        'users': users,
+        'expenses_per_user': expenses,
+        'years': years,
+        'seed': seed,
+        'seconds': round(time.perf_counter() - started, 2)
+    }
+
+def main():
+    from app import create_app
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database', required=True, help='SQLite file to create')
+    parser.add_argument('--users', type=int, default=5)
+    parser.add_argument('--expenses', type=int, default=10000, help='Expenses per user')
+    parser.add_argument('--years', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    app = create_app('production', {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{args.database}',
+        'PERFORMANCE_LOG_LEVEL': 'WARNING',
+    })
+    with app.app_context():
+        print(generate(args.users, args.expenses, args.years, args.seed))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Route latency benchmark over a seeded synthetic dataset.
+
+Generates (or reuses) a SQLite database with benchmarks.datagen, then drives
+the real routes through Flask's test client and reports p50/p95/p99 latency
+and SQL statements per request for each scenario.
+
+    python -m benchmarks.routes --users 3 --expenses 20000 --years 3 --output before.json
+    python -m benchmarks.compare before.json after.json
+"""
+
+import argparse
+import os
+import random
+import tempfile
+from datetime import date
+
+from benchmarks.common import QueryCounter, run_metadata, summarize_ms, write_result
+from benchmarks.datagen import PASSWORD, generate, username_for
+
+def build_app(database, cache_backend):
+    from app import create_app
+
+    return create_app('production', {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database}',
+        'SESSION_COOKIE_SECURE': False,
+        'CACHE_BACKEND': cache_backend,
+        'PERFORMANCE_LOG_LEVEL': 'WARNING',
+    })
+
+def login(client, username):
+    response = client.post('/auth/login', data={'username': username, 'password': PASSWORD})
+    assert response.status_code == 302, f'login failed for {username}'
+
+def deep_cursor(client, path, depth):
+    """Follow next_cursor links from /api/expenses to reach page `depth`."""
+    cursor = None
+    for _ in range(depth):
+        url = path + (f'&cursor={cursor}' if cursor else '')
+        cursor = client.get(url).get_json().get('next_cursor')
+        if not cursor:
+            break
+    return cursor
+
+def scenarios(client, user_index, rng, category_ids, deep_page):
+    """Yield (name, callable) pairs; each callable issues one request."""
+    username = username_for(user_index)
+    deep = deep_cursor(client, '/api/expenses?limit=20', deep_page)
+    deep_query = f'cursor={deep}' if deep else ''
+
+    yield 'dashboard', lambda: client.get('/dashboard')
+    yield 'api.monthly_chart', lambda: client.get('/api/monthly-chart')
+    yield 'api.expense_summary', lambda: client.get('/api/expense-summary')
+    yield 'api.recent_expenses', lambda: client.get('/api/recent-expenses?limit=20')
+    yield 'api.expenses.first_page', lambda: client.get('/api/expenses?limit=20')
+    yield 'api.expenses.deep_page', lambda: client.get(f'/api/expenses?limit=20&{deep_query}')
+    yield 'expenses.list.first_page', lambda: client.get('/expenses/list')
+    yield 'expenses.list.deep_page', lambda: client.get(f'/expenses/list?{deep_query}')
+    yield 'auth.login', lambda: client.post('/auth/login', data={'username': username, 'password': PASSWORD})
+    yield 'expenses.add_expense', lambda: client.post('/expenses/add', data={
+        'category_id': rng.choice(category_ids),
+        'amount': f'{rng.uniform(1, 200):.2f}',
+        'description': 'benchmark expense',
+        'date': date.today().isoformat()
+    })
+
+def run(database, users, expenses, years, seed, requests, deep_page, cache_backend):
+    app = build_app(database, cache_backend)
+
+    with app.app_context():
+        from app import db
+        from app.models import Category, User
+
+        db.create_all()
+        dataset = None
+        if not User.query.filter_by(username=username_for(0)).first():
+            dataset = generate(users, expenses, years, seed)
+
+        counter = QueryCounter(db.engine)
+        rng = random.Random(seed)
+        samples = {}
+
+        for user_index in range(users):
+            user = User.query.filter_by(username=username_for(user_index)).first()
+            category_ids = [category.id for category in Category.query.filter_by(user_id=user.id)]
+            db.session.remove()
+
+            client = app.test_client()
+            login(client, user.username)
+
+            for name, issue in scenarios(client, user_index, rng, category_ids, deep_page):
+                for _ in range(requests):
+                    with counter.measure() as sample:
+                        response = issue()
+                    assert response.status_code < 400, f'{name} returned {response.status_code}'
+                    samples.setdefault(name, []).append(sample)
+
+    results = {}
+    for name, runs in samples.items():
+        results[name] = {
+            'requests': len(runs),
+            **summarize_ms([run['seconds'] for run in runs]),
+            'queries_mean': round(sum(run['queries'] for run in runs) / len(runs), 2),
+            'queries_max': max(run['queries'] for run in runs),
+        }
+
+    return {
+        'benchmark': 'routes',
+        'meta': run_metadata(),
+        'params': {
+            'users': users, 'expenses_per_user': expenses, 'years': years, 'seed': seed,
+            'requests_per_scenario': requests, 'deep_page': deep_page, 'cache_backend': cache_backend,
+        },
+        'dataset': dataset,
+        'scenarios': results,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database', help='SQLite file to use; generated if missing (default: temp file)')
+    parser.add_argument('--users', type=int, default=2)
+    parser.add_argument('--expenses', type=int, default=5000, help='Expenses per user')
+    parser.add_argument('--years', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--requests', type=int, default=30, help='Requests per scenario per user')
+    parser.add_argument('--deep-page', type=int, default=50, help='Page depth for the deep-page scenarios')
+    parser.add_argument('--cache', default='null', choices=['null', 'memory'],
+                        help="Aggregate cache backend ('null' measures the database path)")
+    parser.add_argument('--output', help='Write the JSON result to this file')
+    args = parser.parse_args()
+
+    database = args.database
+    cleanup = False
+    if not database:
+        handle, database = tempfile.mkstemp(suffix='.db', prefix='bench-')
+        os.close(handle)
+        os.remove(database)
+        cleanup = True
+
+    try:
+        result = run(database, args.users, args.expenses, args.years, args.seed,
+                     args.requests, args.deep_page, args.cache)
+    finally:
+        if cleanup:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(database + suffix):
+                    os.remove(database + suffix)
+
+    write_result(result, args.output)
+
+if __name__ == '__main__':
+    main()
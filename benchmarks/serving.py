@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Throughput and latency of the app under different WSGI server configurations.
+
+Seeds a SQLite database, then for each configuration starts a real server
+process ('flask serve', or the Werkzeug dev server for contrast), drives it
+over HTTP keep-alive connections from concurrent client threads, and reports
+requests/s and p50/p95/p99 latency.
+
+Configurations are SERVER[:WORKERSxTHREADS], e.g. gunicorn:2x4, waitress:8
+(threads only) or dev.
+
+    python -m benchmarks.serving --configs gunicorn:1x1,gunicorn:2x4,waitress:8,dev --clients 16
+"""
+
+import argparse
+import http.client
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlencode
+
+from benchmarks.common import ROOT, run_metadata, summarize_ms, write_result
+from benchmarks.datagen import PASSWORD, generate, username_for
+
+DEFAULT_CONFIGS = 'gunicorn:1x1,gunicorn:2x4,waitress:8,dev'
+
+def parse_config(text):
+    server, _, shape = text.partition(':')
+    if server == 'dev':
+        return {'name': text, 'server': 'dev'}
+    if server == 'waitress':
+        return {'name': text, 'server': server, 'workers': 1, 'threads': int(shape or 8)}
+    workers, _, threads = (shape or '2x4').partition('x')
+    return {'name': text, 'server': server, 'workers': int(workers), 'threads': int(threads or 1)}
+
+def server_command(config, port):
+    if config['server'] == 'dev':
+        return [sys.executable, os.path.join(ROOT, 'run.py')]
+    return [sys.executable, '-m', 'flask', '--app', os.path.join(ROOT, 'run.py'), 'serve',
+            '--server', config['server'], '--port', str(port),
+            '--workers', str(config['workers']), '--threads', str(config['threads'])]
+
+def wait_until_ready(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'server exited with code {process.returncode}')
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/api/health')
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('server did not become ready')
+
+def client(port, username, path, requests, durations, errors):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    connection.request('POST', '/auth/login', urlencode({'username': username, 'password': PASSWORD}),
+                       {'Content-Type': 'application/x-www-form-urlencoded'})
+    response = connection.getresponse()
+    response.read()
+    cookie = response.getheader('Set-Cookie', '').split(';', 1)[0]
+
+    for _ in range(requests):
+        started = time.perf_counter()
+        connection.request('GET', path, headers={'Cookie': cookie})
+        response = connection.getresponse()
+        response.read()
+        durations.append(time.perf_counter() - started)
+        if response.status != 200:
+            errors.append(response.status)
+    connection.close()
+
+def run_config(config, env, port, users, clients, requests, path):
+    process = subprocess.Popen(
+        server_command(config, port), cwd=ROOT, env={**env, 'PORT': str(port), 'FLASK_RUN_PORT': str(port)},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_ready(port, process)
+
+        durations = []
+        errors = []
+        threads = [
+            threading.Thread(target=client, args=(port, username_for(index % users), path, requests, durations, errors))
+            for index in range(clients)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    return {
+        'workers': config.get('workers'),
+        'threads': config.get('threads'),
+        'requests': len(durations),
+        'errors': len(errors),
+        'requests_per_second': round(len(durations) / elapsed, 1),
+        **summarize_ms(durations),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--configs', default=DEFAULT_CONFIGS, help='Comma-separated server configurations')
+    parser.add_argument('--users', type=int, default=2)
+    parser.add_argument('--expenses', type=int, default=5000, help='Expenses per user')
+    parser.add_argument('--years', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--clients', type=int, default=16, help='Concurrent client connections')
+    parser.add_argument('--requests', type=int, default=50, help='Requests per client and configuration')
+    parser.add_argument('--path', default='/api/dashboard', help='Authenticated path to request')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--output', help='Write the JSON result to this file')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-serving-')
+    database = os.path.join(workdir, 'bench.db')
+    env = {
+        **os.environ,
+        'FLASK_CONFIG': 'production',
+        'FLASK_DEBUG': 'false',
+        'DATABASE_URL': f'sqlite:///{database}',
+        # Several workers need a shared session store
+        'SESSION_BACKEND': 'filesystem',
+        'SESSION_FILE_DIR': os.path.join(workdir, 'sessions'),
+        'CACHE_BACKEND': 'null',
+        'PERFORMANCE_LOG_LEVEL': 'WARNING',
+        'GUNICORN_ACCESS_LOG': '',
+    }
+
+    try:
+        from app import create_app
+
+        app = create_app('production', {
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database}',
+            'PERFORMANCE_LOG_LEVEL': 'WARNING',
+        })
+        with app.app_context():
+            dataset = generate(args.users, args.expenses, args.years, args.seed)
+
+        results = {}
+        for text in args.configs.split(','):
+            config = parse_config(text.strip())
+            results[config['name']] = run_config(
+                config, env, args.port, args.users, args.clients, args.requests, args.path
+            )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    write_result({
+        'benchmark': 'serving',
+        'meta': run_metadata(),
+        'params': {
+            'users': args.users, 'expenses_per_user': args.expenses, 'years': args.years, 'seed': args.seed,
+            'clients': args.clients, 'requests_per_client': args.requests, 'path': args.path,
+        },
+        'dataset': dataset,
+        'scenarios': results,
+    }, args.output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark: time to import the app package and run create_app.
+
+Each sample runs in a fresh interpreter so module import caches do not
+hide the real cost a new gunicorn worker pays. The probe also counts
+database connections opened during startup, which should be zero.
+
+    python -m benchmarks.startup --runs 20 --config production
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+from benchmarks.common import ROOT, percentile, run_metadata, write_result
+
+PROBE = """
+import json, time
+t0 = time.perf_counter()
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+connections = []
+event.listen(Engine, 'connect', lambda *args: connections.append(1))
+from app import create_app
+t1 = time.perf_counter()
+app = create_app({config!r})
+t2 = time.perf_counter()
+print(json.dumps({{'import': t1 - t0, 'factory': t2 - t1, 'connections': len(connections)}}))
+"""
+
+def summarize(values):
+    return {
+        'p50_ms': round(percentile(values, 50) * 1000, 2),
+        'p95_ms': round(percentile(values, 95) * 1000, 2),
+        'mean_ms': round(statistics.mean(values) * 1000, 2),
+    }
+
+def run(runs, config_name):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE.format(config=config_name)],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    return {
+        'benchmark': 'startup',
+        'meta': run_metadata(),
+        'config': config_name,
+        'runs': runs,
+        'import': summarize([s['import'] for s in samples]),
+        'factory': summarize([s['factory'] for s in samples]),
+        'total': summarize([s['import'] + s['factory'] for s in samples]),
+        'db_connections': max(s['connections'] for s in samples),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--config', default='production')
+    parser.add_argument('--output', help='Write the JSON result to this file')
+    args = parser.parse_args()
+
+    result = run(args.runs, args.config)
+    write_result(result, args.output)
+
+    if result['db_connections']:
+        print('create_app opened database connections during startup', file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
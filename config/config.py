@@ -3,6 +3,24 @@ from datetime import timedelta
 
 basedir = os.path.abspath(os.path.dirname(__file__))
 
+def engine_options(uri, pool_size=5, max_overflow=10, pool_timeout=30, pool_recycle=1800, pool_pre_ping=True):
+    """Build SQLALCHEMY_ENGINE_OPTIONS for a database URI.
+    
+    SQLite gets no pool sizing (Flask-SQLAlchemy picks a suitable pool and
+    the PRAGMAs in SQLITE_PRAGMAS do the tuning); server databases get a
+    sized, pre-pinged, recycled connection pool.
+    """
+    if uri.startswith('sqlite'):
+        return {}
+    
+    return {
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': pool_timeout,
+        'pool_recycle': pool_recycle,
+        'pool_pre_ping': pool_pre_ping,
+    }
+
 class Config:
     """Base configuration."""
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
@@ -10,12 +28,88 @@ class Config:
         'sqlite:///' + os.path.join(basedir, '..', 'expense_tracker.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_RECORD_QUERIES = True
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(
+        SQLALCHEMY_DATABASE_URI,
+        pool_size=int(os.environ.get('DB_POOL_SIZE', 5)),
+        max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    )
+    
+    # Applied to every new SQLite connection: WAL lets readers run alongside
+    # the single writer, and busy_timeout makes writers wait instead of
+    # failing with "database is locked".
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'mmap_size': 268435456,  # 256 MiB
+        'cache_size': -65536,  # 64 MiB
+        'temp_store': 'MEMORY',
+    }
     
     # Session configuration
     PERMANENT_SESSION_LIFETIME = timedelta(days=7)
     SESSION_COOKIE_SECURE = False  # Set to True in production with HTTPS
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Lax'
+    
+    # Server-side sessions ('memory', 'filesystem' or 'redis'). The session
+    # holds a snapshot of the logged-in user, so authenticated requests do
+    # not look the user up. Memory is per process, so production defaults to
+    # filesystem; gunicorn refuses to start several workers on memory sessions.
+    SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'memory')
+    SESSION_FILE_DIR = os.environ.get('SESSION_FILE_DIR')  # default: <instance>/sessions
+    SESSION_REDIS_URL = os.environ.get('SESSION_REDIS_URL', 'redis://localhost:6379/1')
+    SESSION_KEY_PREFIX = 'expense-tracker:session:'
+    SESSION_REFRESH_EACH_REQUEST = False  # only write sessions that changed
+    
+    # Per-user cache for dashboard/API aggregates ('memory', 'redis' or 'null').
+    # The memory backend is per process; use redis when running several workers.
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    CACHE_DEFAULT_TTL = int(os.environ.get('CACHE_DEFAULT_TTL', 300))
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 10000))
+    CACHE_KEY_PREFIX = 'expense-tracker:'
+    
+    # Per-request metrics and structured performance logs (served on /api/metrics)
+    REQUEST_METRICS_ENABLED = True
+    PERFORMANCE_LOG_LEVEL = os.environ.get('PERFORMANCE_LOG_LEVEL', 'INFO')
+    SLOW_QUERY_THRESHOLD = float(os.environ.get('SLOW_QUERY_THRESHOLD', 0.5))  # seconds
+    
+    # Run the independent aggregates behind /api/dashboard concurrently, each
+    # on its own connection (needs Flask's async extra: pip install asgiref)
+    API_CONCURRENT_QUERIES = os.environ.get('API_CONCURRENT_QUERIES', 'true').lower() == 'true'
+    
+    # Most creates plus deletes accepted by one POST /api/expenses/batch
+    BATCH_MAX_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', 500))
+    
+    # Offline sync: most changes per /api/sync call, how long delete
+    # tombstones are kept (older tokens must start a full sync), and how far
+    # back each sync re-reads for writes that committed late
+    SYNC_PAGE_SIZE = int(os.environ.get('SYNC_PAGE_SIZE', 500))
+    SYNC_TOMBSTONE_DAYS = int(os.environ.get('SYNC_TOMBSTONE_DAYS', 90))
+    SYNC_SAFETY_SECONDS = int(os.environ.get('SYNC_SAFETY_SECONDS', 60))
+    
+    # Background jobs, stored in the jobs table and run by 'flask worker'.
+    # Failed attempts are retried with exponential backoff; jobs still
+    # 'running' after JOB_TIMEOUT_SECONDS are assumed lost and requeued.
+    JOBS_EAGER = os.environ.get('JOBS_EAGER', 'false').lower() == 'true'  # run jobs inline, no worker
+    JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 3))
+    JOB_RETRY_BASE_SECONDS = float(os.environ.get('JOB_RETRY_BASE_SECONDS', 10))
+    JOB_RETRY_MAX_SECONDS = float(os.environ.get('JOB_RETRY_MAX_SECONDS', 600))
+    JOB_TIMEOUT_SECONDS = int(os.environ.get('JOB_TIMEOUT_SECONDS', 900))
+    JOB_RETENTION_DAYS = int(os.environ.get('JOB_RETENTION_DAYS', 30))  # finished jobs are then pruned
+    JOB_UPLOAD_DIR = os.environ.get('JOB_UPLOAD_DIR')  # default: <instance>/job-uploads; shared by all workers
+    WORKER_THREADS = int(os.environ.get('WORKER_THREADS', 2))
+    WORKER_POLL_INTERVAL = float(os.environ.get('WORKER_POLL_INTERVAL', 1.0))  # seconds
+    
+    # Password hashing. Hashes run on a bounded pool so a login burst cannot
+    # occupy every request thread; stored hashes made with other parameters
+    # are upgraded at the user's next login.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    PASSWORD_SALT_LENGTH = 16
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 4))  # 0 hashes inline
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 32))
+    PASSWORD_HASH_QUEUE_TIMEOUT = float(os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT', 5))  # seconds
 
 class DevelopmentConfig(Config):
     """Development configuration."""
@@ -27,11 +121,30 @@ class ProductionConfig(Config):
     DEBUG = False
     SESSION_COOKIE_SECURE = True
     SQLALCHEMY_ECHO = False
+    # Production servers run several worker processes, which must share sessions
+    SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'filesystem')
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(
+        Config.SQLALCHEMY_DATABASE_URI,
+        pool_size=int(os.environ.get('DB_POOL_SIZE', 10)),
+        max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        pool_timeout=int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        pool_recycle=int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    )
 
 class TestingConfig(Config):
     """Testing configuration."""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    SQLITE_PRAGMAS = {
+        'synchronous': 'OFF',
+        'temp_store': 'MEMORY',
+    }
+    PERFORMANCE_LOG_LEVEL = 'WARNING'
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    PASSWORD_HASH_WORKERS = 0
+    API_CONCURRENT_QUERIES = False  # in-memory SQLite shares one connection
+    JOBS_EAGER = True  # no worker process in tests
     WTF_CSRF_ENABLED = False
 
 config = {
@@ -0,0 +1,59 @@
+"""
+Gunicorn settings, tunable through the environment.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+WEB_CONCURRENCY worker processes each run GUNICORN_THREADS request threads.
+Threads suit this app: requests mostly wait on the database and password
+hashes run on their own pool. With more than one worker, sessions must live
+in a shared store (SESSION_BACKEND=filesystem or redis).
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', 8000)}")
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+# Import the app once in the master and fork workers from it. Safe because
+# create_app opens no database connections; post_fork drops the (empty)
+# inherited pool anyway so no connection is ever shared between processes.
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+# Seconds an idle client connection is kept open for its next request
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Recycle workers periodically to cap slow memory growth; the jitter keeps
+# workers from restarting all at once
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-') or None
+errorlog = '-'
+
+def on_starting(server):
+    # Memory sessions live inside one worker; refuse to start several of them
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    from config.config import config
+    from app.sessions import check_worker_sessions
+
+    settings = config[os.environ.get('FLASK_CONFIG', 'production')]
+    try:
+        check_worker_sessions(settings.SESSION_BACKEND, server.cfg.workers)
+    except RuntimeError as e:
+        server.log.error(str(e))
+        raise SystemExit(1)
+
+def post_fork(server, worker):
+    from app import db
+    from wsgi import app
+
+    with app.app_context():
+        db.engine.dispose(close=False)
@@ -4,6 +4,7 @@ Flask application entry point for the Expense Tracker app.
 """
 
 import os
+import click
 from dotenv import load_dotenv
 from flask.cli import FlaskGroup
 
@@ -11,7 +12,7 @@ from flask.cli import FlaskGroup
 load_dotenv()
 
 from app import create_app, db
-from app.models import User, Category, Expense
+from app.models import User, Category, Expense, ExpenseRollup
 
 app = create_app()
 
@@ -25,40 +26,25 @@ def make_shell_context():
         'db': db,
         'User': User,
         'Category': Category,
-        'Expense': Expense
+        'Expense': Expense,
+        'ExpenseRollup': ExpenseRollup
     }
 
 @app.cli.command()
 def init_db():
-    """Initialize the database."""
+    """Create the database tables and seed the default categories.
+    
+    Idempotent: run it on deploy, before starting the web workers, which no
+    longer touch the database at startup.
+    """
     db.create_all()
     print("Database tables created!")
     
-    # Check if default categories exist
-    if not Category.query.filter_by(user_id=None).first():
-        print("Adding default categories...")
-        default_categories = [
-            {'name': 'Food & Dining', 'icon': '🍽️', 'color': '#EF4444'},
-            {'name': 'Transportation', 'icon': '🚗', 'color': '#10B981'},
-            {'name': 'Shopping', 'icon': '🛍️', 'color': '#8B5CF6'},
-            {'name': 'Entertainment', 'icon': '🎬', 'color': '#F59E0B'},
-            {'name': 'Bills & Utilities', 'icon': '💡', 'color': '#06B6D4'},
-            {'name': 'Healthcare', 'icon': '🏥', 'color': '#EC4899'},
-            {'name': 'Education', 'icon': '📚', 'color': '#6366F1'},
-            {'name': 'Other', 'icon': '📋', 'color': '#6B7280'},
-        ]
-        
-        for cat_data in default_categories:
-            category = Category(
-                name=cat_data['name'],
-                icon=cat_data['icon'],
-                color=cat_data['color'],
-                user_id=None
-            )
-            db.session.add(category)
-        
-        db.session.commit()
-        print("Default categories added!")
+    added = Category.seed_defaults()
+    db.session.commit()
+    
+    if added:
+        print(f"Added {added} default categories.")
     
     print("Database initialization complete!")
 
@@ -89,7 +75,319 @@ def create_admin():
     db.session.commit()
     print(f"Admin user '{username}' created successfully!")
 
+@app.cli.command()
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--batch-size', type=int, default=1000, help='Users per insert batch and commit.')
+def bulk_create_users(path, batch_size):
+    """Create users from a CSV with username,email and password or password_hash columns."""
+    import csv
+    import time
+    
+    started = time.perf_counter()
+    created = skipped = 0
+    
+    def flush(batch):
+        usernames = [record['username'] for record in batch]
+        emails = [record['email'] for record in batch]
+        taken = set()
+        for username, email in db.session.query(User.username, User.email).filter(
+            User.username.in_(usernames) | User.email.in_(emails)
+        ):
+            taken.update((username, email))
+        
+        fresh, seen = [], set()
+        for record in batch:
+            if record['username'] in taken or record['email'] in taken or \
+                    record['username'] in seen or record['email'] in seen:
+                print(f"Skipping {record['username']}: username or email already exists")
+                continue
+            seen.update((record['username'], record['email']))
+            fresh.append(record)
+        
+        user_ids = User.bulk_create(fresh)
+        db.session.commit()
+        return len(user_ids), len(batch) - len(fresh)
+    
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        batch = []
+        for record in csv.DictReader(f):
+            if not record.get('username') or not record.get('email') or \
+                    not (record.get('password') or record.get('password_hash')):
+                print(f"Skipping incomplete row: {record.get('username') or record}")
+                skipped += 1
+                continue
+            batch.append(record)
+            if len(batch) >= batch_size:
+                added, dropped = flush(batch)
+                created, skipped = created + added, skipped + dropped
+                batch = []
+        if batch:
+            added, dropped = flush(batch)
+            created, skipped = created + added, skipped + dropped
+    
+    elapsed = time.perf_counter() - started
+    rate = created / elapsed if elapsed else 0
+    print(f"Created {created} users ({skipped} skipped) in {elapsed:.2f}s, {rate:.0f} users/s.")
+
+@app.cli.command()
+@click.option('--user-id', type=int, default=None, help='Only rebuild rollups for this user.')
+@click.option('--queue', is_flag=True, help="Queue the rebuild for 'flask worker' instead of running it here.")
+def rebuild_rollups(user_id, queue):
+    """Rebuild the monthly expense rollups from the raw expenses."""
+    if queue:
+        from app.jobs import enqueue
+        print(f"Queued job {enqueue('rebuild_rollups', {'user_id': user_id}).id}.")
+        return
+    
+    buckets = ExpenseRollup.rebuild(user_id)
+    db.session.commit()
+    print(f"Rebuilt {buckets} rollup buckets.")
+
+@app.cli.command()
+@click.option('--user-id', type=int, default=None, help='Only verify rollups for this user.')
+def verify_rollups(user_id):
+    """Verify the monthly expense rollups against the raw expenses."""
+    mismatches = ExpenseRollup.verify(user_id)
+    
+    if not mismatches:
+        print("Rollups are consistent with the expenses table.")
+        return
+    
+    for mismatch in mismatches:
+        user, year, month, category = mismatch['key']
+        print(f"user={user} {year}-{month:02d} category={category}: "
+              f"expected {mismatch['expected']}, found {mismatch['actual']}")
+    
+    print(f"{len(mismatches)} rollup buckets are out of date; run 'flask rebuild-rollups'.")
+    raise SystemExit(1)
+
+@app.cli.command()
+def rebuild_search_index():
+    """Create the expense full-text index if missing and rebuild its contents."""
+    from app.search import ensure_search_index
+    
+    with db.engine.begin() as connection:
+        dialect = ensure_search_index(connection)
+    
+    if dialect in ('sqlite', 'postgresql'):
+        print(f"Search index ready ({dialect}).")
+    else:
+        print(f"No full-text index for {dialect}; search falls back to substring matching.")
+
+@app.cli.command()
+@click.option('--dry-run', is_flag=True, help='Only report categories whose counters drifted.')
+@click.option('--queue', is_flag=True, help="Queue the repair for 'flask worker' instead of running it here.")
+def reconcile_category_counters(dry_run, queue):
+    """Recompute category expense counts and totals from the expenses table."""
+    if queue and not dry_run:
+        from app.jobs import enqueue
+        print(f"Queued job {enqueue('reconcile_category_counters').id}.")
+        return
+    
+    mismatches = Category.reconcile_counters(dry_run=dry_run)
+    
+    for mismatch in mismatches:
+        print(f"category={mismatch['id']}: expected {mismatch['expected']}, found {mismatch['actual']}")
+    
+    if dry_run:
+        db.session.rollback()
+        print(f"{len(mismatches)} categories have out-of-date counters.")
+        if mismatches:
+            raise SystemExit(1)
+        return
+    
+    db.session.commit()
+    print(f"Reconciled {len(mismatches)} categories.")
+
+@app.cli.command()
+@click.argument('username')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'file_format', type=click.Choice(['csv', 'ofx']), default=None,
+              help='File format (defaults to the file extension).')
+@click.option('--batch-size', type=int, default=1000, help='Rows per insert batch and commit.')
+@click.option('--default-category', default=None, help='Category for rows without a known one.')
+@click.option('--expense-sign', type=click.Choice(['negative', 'positive']), default='negative',
+              help='Sign of spending in a CSV amount column (positive for this app\'s own export).')
+def import_expenses(username, path, file_format, batch_size, default_category, expense_sign):
+    """Bulk import a bank CSV/OFX export for a user."""
+    from app.services import import_expenses as run_import, ImportFileError
+    
+    user = User.query.filter_by(username=username).first()
+    if not user:
+        print(f"User '{username}' not found!")
+        raise SystemExit(1)
+    
+    file_format = file_format or path.rsplit('.', 1)[-1].lower()
+    
+    try:
+        with open(path, encoding='utf-8-sig', errors='replace', newline='') as stream:
+            result = run_import(user.id, stream, file_format=file_format, batch_size=batch_size,
+                                default_category=default_category, expense_sign=expense_sign)
+    except ImportFileError as e:
+        print(f"Import failed: {e}")
+        raise SystemExit(1)
+    
+    for error in result.errors:
+        print(f"line {error['line']}: {error['error']}")
+    
+    print(f"Imported {result.imported} expenses in {result.batches} batches "
+          f"({result.skipped} skipped, {result.inflows} inflows ignored) in {result.elapsed:.2f}s, {result.rows_per_second} rows/s.")
+
+@app.cli.command()
+@click.argument('username')
+def revoke_sessions(username):
+    """Log a user out everywhere (filesystem and redis session backends)."""
+    user = User.query.filter_by(username=username).first()
+    if not user:
+        print(f"User '{username}' not found!")
+        raise SystemExit(1)
+    
+    store = app.extensions.get('session_store')
+    if app.config.get('SESSION_BACKEND') == 'memory':
+        print("The memory session backend lives inside each server process; restart the server instead.")
+        raise SystemExit(1)
+    
+    print(f"Revoked {store.revoke_user(user.id)} sessions for '{username}'.")
+
+@app.cli.command()
+@click.option('--threads', type=int, default=None, help='Jobs run at once (default WORKER_THREADS).')
+@click.option('--poll-interval', type=float, default=None, help='Seconds between polls of an empty queue (default WORKER_POLL_INTERVAL).')
+@click.option('--burst', is_flag=True, help='Exit once no job is due instead of waiting for more.')
+def worker(threads, poll_interval, burst):
+    """Run queued background jobs (imports, rollup rebuilds, counter repairs)."""
+    import logging
+    import signal
+    from app.jobs import Worker
+    
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(levelname)s %(message)s')
+    
+    job_worker = Worker(
+        app,
+        threads=threads or app.config.get('WORKER_THREADS', 2),
+        poll_interval=poll_interval or app.config.get('WORKER_POLL_INTERVAL', 1.0),
+        burst=burst
+    )
+    # Finish the jobs in hand on SIGTERM, like Ctrl+C
+    signal.signal(signal.SIGTERM, lambda signum, frame: job_worker.stop())
+    
+    print(f"Worker {job_worker.name} running {job_worker.threads} threads{' (burst)' if burst else ''}.")
+    processed = job_worker.run()
+    print(f"Processed {processed} jobs.")
+
+@app.cli.command()
+@click.option('--days', type=int, default=None, help='Keep finished jobs this many days (default JOB_RETENTION_DAYS).')
+def prune_jobs(days):
+    """Delete finished background jobs, and any uploads they left, past the retention window."""
+    from datetime import datetime, timedelta
+    from app.jobs import prune_jobs as run_prune
+    
+    days = app.config.get('JOB_RETENTION_DAYS', 30) if days is None else days
+    removed = run_prune(datetime.utcnow() - timedelta(days=days))
+    db.session.commit()
+    
+    print(f"Removed {removed} finished jobs older than {days} days.")
+
+@app.cli.command()
+@click.option('--days', type=int, default=None, help='Keep tombstones this many days (default SYNC_TOMBSTONE_DAYS).')
+def prune_tombstones(days):
+    """Delete sync tombstones older than the retention window."""
+    from datetime import datetime, timedelta
+    from app.models import Tombstone
+    
+    days = app.config.get('SYNC_TOMBSTONE_DAYS', 90) if days is None else days
+    removed = Tombstone.prune(datetime.utcnow() - timedelta(days=days))
+    db.session.commit()
+    
+    print(f"Removed {removed} tombstones older than {days} days.")
+
+@app.cli.command()
+def prune_sessions():
+    """Delete expired sessions (filesystem session backend)."""
+    backend = app.config.get('SESSION_BACKEND')
+    if backend == 'memory':
+        print("The memory session backend lives inside each server process and prunes itself.")
+        return
+    if backend == 'redis':
+        print("Redis expires sessions itself; nothing to prune.")
+        return
+    
+    removed = app.extensions['session_store'].prune_expired()
+    print(f"Removed {removed} expired sessions.")
+
+@app.cli.command()
+@click.option('--user-id', type=int, default=1, help='User to run the aggregate queries for.')
+def check_query_plans(user_id):
+    """Check that the aggregate queries seek indexes instead of scanning (SQLite only)."""
+    from app.query_plans import check_query_plans as explain_aggregates
+    
+    if db.engine.dialect.name != 'sqlite':
+        print("Query plan checks only run against SQLite.")
+        return
+    
+    user = User.query.get(user_id)
+    category = Category.get_user_categories(user_id)[:1]
+    
+    if not user or not category:
+        print(f"User {user_id} with at least one category is required; run 'flask init-db' and register first.")
+        raise SystemExit(1)
+    
+    failures = 0
+    
+    for name, ok, plan in explain_aggregates(user, category[0]):
+        failures += not ok
+        print(f"[{'ok' if ok else 'FAIL'}] {name}: {'; '.join(plan)}")
+    
+    if failures:
+        print(f"{failures} aggregate queries do not use an index search.")
+        raise SystemExit(1)
+
+@app.cli.command()
+@click.option('--server', type=click.Choice(['auto', 'gunicorn', 'waitress']), default='auto',
+              help='WSGI server (auto: gunicorn where available, otherwise waitress).')
+@click.option('--host', default='0.0.0.0', help='Interface to bind.')
+@click.option('--port', type=int, default=lambda: int(os.environ.get('PORT', 8000)), help='Port to bind.')
+@click.option('--workers', type=int, default=None, help='Worker processes (gunicorn; default WEB_CONCURRENCY or 2 x CPUs + 1).')
+@click.option('--threads', type=int, default=None, help='Request threads per worker (default GUNICORN_THREADS or 4; waitress 8).')
+def serve(server, host, port, workers, threads):
+    """Run the app on a production WSGI server (see wsgi.py and gunicorn.conf.py)."""
+    import importlib.util
+    import multiprocessing
+    import sys
+    from config.config import config
+    from app.sessions import check_worker_sessions
+    
+    if server == 'auto':
+        server = 'gunicorn' if os.name != 'nt' and importlib.util.find_spec('gunicorn') else 'waitress'
+    
+    # wsgi.py builds the app from FLASK_CONFIG (default production), which
+    # may differ from the config this CLI process loaded
+    served = config[os.environ.get('FLASK_CONFIG', 'production')]
+    if server == 'gunicorn':
+        processes = workers or int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+        try:
+            check_worker_sessions(served.SESSION_BACKEND, processes)
+        except RuntimeError as e:
+            print(f"Error: {e}.")
+            raise SystemExit(1)
+    
+    if server == 'gunicorn':
+        root = os.path.dirname(os.path.abspath(__file__))
+        os.environ['GUNICORN_BIND'] = f"{host}:{port}"
+        if workers:
+            os.environ['WEB_CONCURRENCY'] = str(workers)
+        if threads:
+            os.environ['GUNICORN_THREADS'] = str(threads)
+        
+        # Replace this process so signals reach the gunicorn master directly
+        os.execv(sys.executable, [sys.executable, '-m', 'gunicorn', '--chdir', root,
+                                  '-c', os.path.join(root, 'gunicorn.conf.py'), 'wsgi:app'])
+    
+    from waitress import serve as waitress_serve
+    from wsgi import app as wsgi_app
+    
+    waitress_serve(wsgi_app, host=host, port=port, threads=threads or int(os.environ.get('WAITRESS_THREADS', 8)))
+
 if __name__ == '__main__':
-    # For development - use flask run for production
+    # Development server only; use 'flask serve' (or wsgi.py) in production
     port = int(os.environ.get('FLASK_RUN_PORT', 5000))
-    app.run(debug=True, host='0.0.0.0', port=port)
\ No newline at end of file
+    app.run(debug=os.environ.get('FLASK_DEBUG', 'true').lower() in ('1', 'true'), host='0.0.0.0', port=port)
\ No newline at end of file
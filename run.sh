@@ -10,22 +10,15 @@ pip install -r requirements.txt
 
 # Initialize database
 echo "Initializing database..."
-python3 run.py init-db
+FLASK_APP=run.py flask init-db
 
-# Run the application
+# Run the application on the production WSGI server. The quick start keeps
+# the development config (no HTTPS-only cookies, local secret key), bound to
+# this machine, with sessions shared by the workers.
+PORT=${PORT:-8000}
+export FLASK_CONFIG=${FLASK_CONFIG:-development}
+export SESSION_BACKEND=${SESSION_BACKEND:-filesystem}
 echo "Starting Flask application..."
-echo "Access the app at: http://localhost:5000"
+echo "Access the app at: http://localhost:$PORT"
 echo "Press Ctrl+C to stop the server"
-python3 run.pyInstall dependencies
-echo "Installing dependencies..."
-pip install -r requirements.txt
-
-# Initialize database
-echo "Initializing database..."
-python3 -c "from app import init_db; init_db(); print('Database initialized successfully!')"
-
-# Run the application
-echo "Starting Flask application..."
-echo "Access the app at: http://localhost:6001"
-echo "Press Ctrl+C to stop the server"
-python3 app.py
\ No newline at end of file
+FLASK_APP=run.py exec flask serve --host 127.0.0.1 --port "$PORT"
@@ -0,0 +1,56 @@
+from datetime import date, timedelta
+
+import pytest
+
+from app import create_app, db
+from app.models import User, Category, Expense
+
+CATEGORY_NAMES = (
+    'Food & Dining', 'Transportation', 'Shopping', 'Entertainment',
+    'Bills & Utilities', 'Healthcare', 'Education', 'Other'
+)
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+
+    yield app
+
+    with app.app_context():
+        db.drop_all()
+
+@pytest.fixture
+def user_id(app):
+    """Id of a user with eight categories of their own."""
+    with app.app_context():
+        user = User('alice', 'alice@example.com', 'secret1')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add_all([
+            Category(name, user_id=user.id) for name in CATEGORY_NAMES
+        ])
+        db.session.commit()
+        return user.id
+
+@pytest.fixture
+def expenses(app, user_id):
+    """60 expenses for the user, one a day, spread over their categories."""
+    with app.app_context():
+        categories = Category.get_user_categories(user_id)
+        today = date.today()
+        db.session.add_all([
+            Expense(user_id, categories[i % len(categories)].id, 10 + i, f'expense {i}', today - timedelta(days=i))
+            for i in range(60)
+        ])
+        db.session.commit()
+
+@pytest.fixture
+def client(app, user_id):
+    """Test client logged in as the user."""
+    client = app.test_client()
+    response = client.post('/auth/login', data={'username': 'alice', 'password': 'secret1'})
+    assert response.status_code == 302
+    return client
@@ -0,0 +1,24 @@
+from datetime import date, timedelta
+
+from app import db
+from app.models import Category, Expense
+from app.services.analytics import get_expense_analytics
+
+def add_daily_expenses(user_id, category_id, date_from, date_to, amount=10):
+    day = date_from
+    while day <= date_to:
+        db.session.add(Expense(user_id, category_id, amount, None, day))
+        day += timedelta(days=1)
+    db.session.commit()
+
+def test_partial_edge_month_is_compared_with_the_same_days(app, user_id):
+    with app.app_context():
+        category = Category.get_user_categories(user_id)[0]
+        add_daily_expenses(user_id, category.id, date(2023, 1, 1), date(2024, 3, 31))
+
+        monthly = get_expense_analytics(user_id, date(2024, 3, 20), date(2024, 3, 31))['monthly']
+
+    assert monthly['totals'] == [120.0]
+    assert monthly['yoy_change'] == [0.0]
+    assert monthly['yoy_percent'] == [0.0]
+    assert monthly['rolling_average'] == [None]
@@ -0,0 +1,25 @@
+from app.jobs import JOB_HANDLERS, JobFailed, enqueue
+
+def test_unexpected_errors_are_not_shown_to_the_user(app, monkeypatch, caplog):
+    def broken(payload):
+        raise RuntimeError('no such table: /srv/app/instance/secret.db')
+
+    monkeypatch.setitem(JOB_HANDLERS, 'broken', broken)
+
+    with app.app_context():
+        job = enqueue('broken')
+        assert job.status == job.FAILED
+        assert job.error == 'Internal error'
+        assert 'no such table' not in str(job.to_dict())
+
+    assert 'no such table' in caplog.text
+
+def test_job_failed_messages_are_kept(app, monkeypatch):
+    def rejected(payload):
+        raise JobFailed('CSV file has no header row')
+
+    monkeypatch.setitem(JOB_HANDLERS, 'rejected', rejected)
+
+    with app.app_context():
+        job = enqueue('rejected')
+        assert job.error == 'CSV file has no header row'
@@ -0,0 +1,26 @@
+from datetime import date
+
+from app import db
+from app.models import Category, Expense, ExpenseRollup
+
+def add_march_expenses(user_id, category_id, years):
+    """Ten a day through March of each year, with the rollups kept in step."""
+    expenses = [
+        Expense(user_id, category_id, 10, None, date(year, 3, day))
+        for year in years for day in range(1, 32)
+    ]
+    db.session.add_all(expenses)
+    ExpenseRollup.record([expense.rollup_row() for expense in expenses])
+    db.session.commit()
+
+def test_month_without_year_means_current_year_everywhere(app, user_id):
+    this_year = date.today().year
+
+    with app.app_context():
+        category = Category.get_user_categories(user_id)[0]
+        add_march_expenses(user_id, category.id, (this_year - 1, this_year))
+
+        by_category = {row.id: float(row.total) for row in Expense.get_category_totals(user_id, month=3)}
+
+        assert category.get_total_amount(user_id, month=3) == 310.0
+        assert by_category[category.id] == 310.0
@@ -0,0 +1,12 @@
+from flask_sqlalchemy.record_queries import get_recorded_queries
+
+def count_queries(client, path):
+    """Number of SQL statements issued while serving path."""
+    with client:
+        response = client.get(path)
+        assert response.status_code == 200
+        return len(get_recorded_queries())
+
+def test_recent_expenses_query_count_does_not_grow_with_limit(client, expenses):
+    # Categories are eager-loaded, so a bigger page must not add per-row queries
+    assert count_queries(client, '/api/recent-expenses?limit=5') == count_queries(client, '/api/recent-expenses?limit=50')
@@ -0,0 +1,11 @@
+from app import db
+from app.models import User, Category
+from app.query_plans import check_query_plans
+
+def test_aggregate_queries_use_index_searches(app, user_id):
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        category = Category.get_user_categories(user_id)[0]
+        failures = [(name, plan) for name, ok, plan in check_query_plans(user, category) if not ok]
+
+    assert not failures
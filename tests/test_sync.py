@@ -0,0 +1,25 @@
+from datetime import datetime, timedelta
+
+from app import db
+from app.models import Category, Expense, Tombstone
+from app.services import get_sync_changes
+
+def test_write_committed_after_a_sync_is_not_skipped(app, user_id):
+    with app.app_context():
+        category = Category.get_user_categories(user_id)[0]
+        db.session.add(Expense(user_id, category.id, 10, 'seen'))
+        db.session.commit()
+
+        token = get_sync_changes(user_id)['token']
+
+        # Stamped before the sync above ran, but only committed after it
+        late = Expense(user_id, category.id, 20, 'late')
+        late.updated_at = datetime.utcnow() - timedelta(seconds=5)
+        db.session.add(late)
+        Tombstone.record(user_id, 'expense', [999])
+        db.session.commit()
+
+        changes = get_sync_changes(user_id, token)
+
+    assert 'late' in [expense['description'] for expense in changes['expenses']]
+    assert changes['deleted']['expenses'] == [999]
@@ -0,0 +1,19 @@
+"""
+WSGI entry point for production servers.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+    waitress-serve --port=8000 wsgi:app
+
+Defaults to the production config; set FLASK_CONFIG to override. Building
+the app does no database I/O, so servers may import this module once and
+fork workers from it (gunicorn's preload_app).
+"""
+
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app import create_app
+
+app = create_app(os.environ.get('FLASK_CONFIG', 'production'))